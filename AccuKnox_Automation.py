@@ -10,7 +10,7 @@ from datetime import datetime
 # Auto-install dependencies
 # -----------------------------
 
-required = ["playwright"]
+required = ["playwright", "psutil"]
 for pkg in required:
     try:
         __import__(pkg)
@@ -24,6 +24,8 @@ except ImportError:
     subprocess.check_call([sys.executable, "-m", "playwright", "install"])
     from playwright.sync_api import sync_playwright, expect
 
+from browser_profiler import BrowserProfiler
+
 
 # -----------------------------
 # Configuration
@@ -34,6 +36,10 @@ def get_config():
         "url": "https://opensource-demo.orangehrmlive.com/web/index.php/auth/login",
         "username": "Admin",
         "password": "admin123",
+        # Resource profiling of Python/Chromium per step (see browser_profiler.py)
+        "profile_resources": True,
+        "profile_interval": 0.5,
+        "profile_report": "browser_profile.json",
     }
 
 
@@ -519,48 +525,51 @@ def main():
     cfg = get_config()
     test_results = []
     start_time = datetime.now()
+    profiler = BrowserProfiler(interval=cfg["profile_interval"],
+                               enabled=cfg["profile_resources"],
+                               report_file=cfg["profile_report"])
     
-    with sync_playwright() as p:
+    with sync_playwright() as p, profiler:
         browser = p.chromium.launch(headless=False, slow_mo=150)
         page = browser.new_page()
         page.set_default_timeout(15000)
         
         # ---------- 1. LOGIN ----------
-        if not execute_login(page, cfg, test_results):
+        if not profiler.run(execute_login, page, cfg, test_results):
             browser.close()
             return
         
         # ---------- 2. NAVIGATE TO ADMIN ----------
-        if not execute_navigate_to_admin(page, test_results):
+        if not profiler.run(execute_navigate_to_admin, page, test_results):
             browser.close()
             return
         
         # ---------- 3. ADD USER (2nd OPTIONS) ----------
-        original_username = execute_add_user(page, test_results)
+        original_username = profiler.run(execute_add_user, page, test_results)
         if not original_username:
             browser.close()
             return
         
         # ---------- 4. SEARCH USER ----------
-        if not execute_search_user(page, original_username, test_results):
+        if not profiler.run(execute_search_user, page, original_username, test_results):
             browser.close()
             return
         
         # ---------- 5. EDIT USER (3rd OPTIONS) ----------
-        new_username = execute_edit_user_all_fields(page, original_username, test_results)
+        new_username = profiler.run(execute_edit_user_all_fields, page, original_username, test_results)
         
         # ---------- 6. VALIDATE ALL UPDATES ----------
-        if not execute_validate_all_updates(page, original_username, new_username, test_results):
+        if not profiler.run(execute_validate_all_updates, page, original_username, new_username, test_results):
             browser.close()
             return
         
         # ---------- 7. DELETE USER ----------
-        if not execute_delete_user(page, new_username, test_results):
+        if not profiler.run(execute_delete_user, page, new_username, test_results):
             browser.close()
             return
         
         # ---------- 8. VALIDATE DELETION ----------
-        execute_validate_deletion(page, new_username, test_results)
+        profiler.run(execute_validate_deletion, page, new_username, test_results)
         
         browser.close()
     
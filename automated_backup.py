@@ -11,9 +11,15 @@ import os
 import tarfile
 import time
 import datetime
+import hashlib
 import paramiko
 from pathlib import Path
 
+import backup_catalog
+import backup_metrics
+from backup_governor import ResourceGovernor
+from log_writer import get_writer
+
 # ----------------------------
 # CONFIGURATION
 # ----------------------------
@@ -34,6 +40,19 @@ REMOTE_CONFIG = {
     "remote_path": "/home/your_username/backups/"
 }
 
+# Low-priority mode for shared hosts (see backup_governor.py).
+# Rates are in MB/s; None means unlimited.
+GOVERNOR_ENABLED = False
+GOVERNOR_CONFIG = {
+    "read_mbps": 20,
+    "upload_mbps": 5,
+    "cpu_nice": 10,
+    "io_nice": True,
+    "adaptive": True,           # back off when the host is under pressure
+    "max_load_per_cpu": 1.0,    # 1-minute load average per CPU
+    "max_disk_latency_ms": 50   # average ms per disk I/O
+}
+
 # Backup metadata
 TIMESTAMP = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
 BACKUP_NAME = f"backup_{TIMESTAMP}.tar.gz"
@@ -42,6 +61,20 @@ LOCAL_BACKUP_PATH = os.path.join(BACKUP_DIR, BACKUP_NAME)
 # Report file
 REPORT_FILE = "backup_report.txt"
 
+# Buffered report writer settings (see log_writer.py)
+LOG_OPTIONS = {
+    "flush_interval": 1.0,             # seconds before buffered lines hit the disk
+    "max_bytes": 10 * 1024 * 1024,     # rotate the report at 10 MB
+    "backup_count": 5,                 # keep 5 rotated reports
+    "compress": False                  # keep rotated reports plain so log_query.py can index them
+}
+
+# SQLite catalog of runs and their per-file listings (see backup_catalog.py)
+CATALOG_FILE = backup_catalog.CATALOG_FILE
+
+# JSON-lines file with one structured metrics record per run (see backup_metrics.py)
+METRICS_FILE = backup_metrics.METRICS_FILE
+
 
 # ----------------------------
 # UTILITY FUNCTIONS
@@ -52,29 +85,177 @@ def log_message(message):
     timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     formatted = f"[{timestamp}] {message}"
     print(formatted)
-    with open(REPORT_FILE, "a", encoding="utf-8") as f:
-        f.write(formatted + "\n")
+    get_writer(REPORT_FILE, **LOG_OPTIONS).write(formatted + "\n")
+
+
+class HashingReader:
+    """
+    File wrapper that computes the SHA-256 of everything read through it.
+    When given, `governor` rate limits the reads and `metrics` times them.
+    """
+
+    def __init__(self, fileobj, governor=None, metrics=None):
+        self.fileobj = fileobj
+        self.governor = governor
+        self.metrics = metrics
+        self.sha256 = hashlib.sha256()
+
+    def read(self, size=-1):
+        start = time.perf_counter()
+        data = self.fileobj.read(size)
+        if self.metrics is not None:
+            self.metrics.add("read", time.perf_counter() - start)
+            self.metrics.bytes_in += len(data)
+        self.sha256.update(data)
+        if self.governor is not None:
+            start = time.perf_counter()
+            self.governor.throttle_read(len(data))
+            if self.metrics is not None:
+                self.metrics.throttled += time.perf_counter() - start
+        return data
+
+
+class TimedWriter:
+    """File wrapper that times writes of the compressed archive."""
+
+    def __init__(self, fileobj, metrics=None):
+        self.fileobj = fileobj
+        self.metrics = metrics
+
+    def write(self, data):
+        start = time.perf_counter()
+        written = self.fileobj.write(data)
+        if self.metrics is not None:
+            self.metrics.add("write", time.perf_counter() - start)
+            self.metrics.bytes_out += len(data)
+        return written
+
+    def flush(self):
+        self.fileobj.flush()
+
+
+def scan_tree(source_dir):
+    """
+    Walks `source_dir` and returns (path, arcname) pairs in archive order,
+    like `tar.add` would visit them. Symlinked directories are listed but
+    not followed.
+    """
+    entries = []
+    root_arcname = os.path.basename(source_dir)
+    for dirpath, dirnames, filenames in os.walk(source_dir):
+        dirnames.sort()
+        rel = os.path.relpath(dirpath, source_dir)
+        arcdir = root_arcname if rel == "." else os.path.join(root_arcname, rel)
+        entries.append((dirpath, arcdir))
+        links = [name for name in dirnames if os.path.islink(os.path.join(dirpath, name))]
+        for name in sorted(filenames + links):
+            entries.append((os.path.join(dirpath, name), os.path.join(arcdir, name)))
+    return entries
+
 
+def add_tree(tar, entries, files, governor=None, metrics=None):
+    """
+    Adds the scanned `entries` to `tar` and appends (path, mtime, size,
+    sha256) for every regular file to `files`. Entries tar cannot store
+    (sockets, doors) are skipped, as `tar.add` does.
+    """
+    for path, arcname in entries:
+        info = tar.gettarinfo(path, arcname=arcname)
+        if info is None:
+            log_message(f"⚠️ Skipped unsupported file type: {path}")
+            continue
+        if not info.isreg():
+            tar.addfile(info)
+            continue
+        with open(path, "rb") as f:
+            reader = HashingReader(f, governor, metrics)
+            tar.addfile(info, reader)
+        files.append((info.name, info.mtime, info.size, reader.sha256.hexdigest()))
 
-def create_backup(source_dir, destination_path):
-    """Create a tar.gz backup of the specified directory."""
+
+def create_backup(source_dir, destination_path, stats=None, governor=None, metrics=None):
+    """
+    Create a tar.gz backup of the specified directory.
+
+    If a `stats` dict is given, it is filled with the per-file listing
+    ("files") and the failure reason ("error") for the backup catalog.
+    Source reads are rate limited by `governor` and phases are timed into
+    `metrics` when those are given.
+    """
+    stats = {} if stats is None else stats
+    stats.setdefault("files", [])
+    stats["error"] = None
     log_message(f"📦 Starting backup of '{source_dir}'...")
     start_time = time.time()
     try:
+        if not os.path.isdir(source_dir):
+            raise FileNotFoundError(f"Source directory not found: '{source_dir}'")
+        scan_start = time.perf_counter()
+        entries = scan_tree(source_dir)
+        archive_start = time.perf_counter()
         os.makedirs(os.path.dirname(destination_path), exist_ok=True)
-        with tarfile.open(destination_path, "w:gz") as tar:
-            tar.add(source_dir, arcname=os.path.basename(source_dir))
+        with open(destination_path, "wb") as raw:
+            writer = TimedWriter(raw, metrics)
+            with tarfile.open(destination_path, "w:gz", fileobj=writer) as tar:
+                add_tree(tar, entries, stats["files"], governor, metrics)
+        if metrics is not None:
+            # Whatever the archive step spent outside reads, writes and
+            # throttling is tar/gzip/hashing CPU time
+            archive_elapsed = time.perf_counter() - archive_start
+            metrics.add("scan", archive_start - scan_start)
+            metrics.add("compress", max(0.0, archive_elapsed - metrics.durations["read"]
+                                        - metrics.durations["write"] - metrics.throttled))
+            metrics.files = len(stats["files"])
         elapsed = time.time() - start_time
         size = os.path.getsize(destination_path) / (1024 * 1024)
         log_message(f"✅ Backup created successfully: {destination_path}")
         log_message(f"   Size: {size:.2f} MB | Time taken: {elapsed:.2f} sec")
         return True
     except Exception as e:
+        stats["error"] = str(e)
+        if metrics is not None:
+            metrics.fail(f"backup: {e}")
         log_message(f"❌ Failed to create backup: {e}")
         return False
 
 
-def upload_backup_scp(local_path, remote_config):
+def record_in_catalog(stats, started_at, success_local, success_remote):
+    """Record this run and its file listing in the SQLite backup catalog."""
+    finished_at = time.time()
+    files = stats.get("files", [])
+    archive_bytes = os.path.getsize(LOCAL_BACKUP_PATH) if success_local else 0
+    if not REMOTE_ENABLED:
+        remote_status = "disabled"
+    else:
+        remote_status = "success" if success_remote else "failed"
+    run = {
+        "timestamp": TIMESTAMP,
+        "source_dir": SOURCE_DIR,
+        "backup_path": LOCAL_BACKUP_PATH,
+        "started_at": started_at,
+        "finished_at": finished_at,
+        "elapsed": finished_at - started_at,
+        "status": "success" if success_local else "failed",
+        "remote_status": remote_status,
+        "file_count": len(files),
+        "source_bytes": sum(size for _, _, size, _ in files),
+        "archive_bytes": archive_bytes,
+        "error": stats.get("error"),
+    }
+    try:
+        conn = backup_catalog.connect(CATALOG_FILE)
+        try:
+            run_id = backup_catalog.record_run(conn, run, files)
+        finally:
+            conn.close()
+        log_message(f"🗂️ Run #{run_id} recorded in catalog '{CATALOG_FILE}' ({len(files)} files)")
+        return True
+    except Exception as e:
+        log_message(f"❌ Failed to record run in catalog: {e}")
+        return False
+
+
+def upload_backup_scp(local_path, remote_config, governor=None, metrics=None):
     """Upload backup to remote server using SCP (via paramiko)."""
     try:
         log_message(f"🌐 Connecting to remote server {remote_config['hostname']}...")
@@ -89,17 +270,51 @@ def upload_backup_scp(local_path, remote_config):
         sftp = ssh.open_sftp()
         remote_path = os.path.join(remote_config["remote_path"], os.path.basename(local_path))
         log_message(f"⬆️ Uploading backup to remote path: {remote_path}")
-        sftp.put(local_path, remote_path)
+        callback = None
+        if governor is not None:
+            sent = [0]
+
+            def callback(transferred, total):
+                governor.throttle_upload(transferred - sent[0])
+                sent[0] = transferred
+
+        upload_start = time.perf_counter()
+        sftp.put(local_path, remote_path, callback=callback)
+        if metrics is not None:
+            metrics.add("upload", time.perf_counter() - upload_start)
+            metrics.bytes_uploaded = os.path.getsize(local_path)
         sftp.close()
         ssh.close()
         log_message("✅ Backup uploaded successfully to remote server.")
         return True
     except Exception as e:
+        if metrics is not None:
+            metrics.fail(f"upload: {e}")
         log_message(f"❌ Remote upload failed: {e}")
         return False
 
 
-def generate_summary(success_local, success_remote):
+def record_metrics(metrics, governor=None):
+    """Append this run's per-phase metrics to the JSON-lines metrics file."""
+    record = metrics.record(
+        timestamp=TIMESTAMP,
+        source_dir=SOURCE_DIR,
+        backup_path=LOCAL_BACKUP_PATH,
+        remote_enabled=REMOTE_ENABLED,
+        governor=governor.summary() if governor is not None else None,
+    )
+    try:
+        backup_metrics.write_record(record, METRICS_FILE)
+    except OSError as e:
+        log_message(f"❌ Failed to write metrics: {e}")
+        return False
+    phases = " | ".join(f"{name} {seconds:.2f}s" for name, seconds in record["durations_sec"].items())
+    log_message(f"📈 Phases: {phases}")
+    log_message(f"📈 Metrics appended to '{METRICS_FILE}'")
+    return True
+
+
+def generate_summary(success_local, success_remote, governor=None):
     """Generate summary of the backup operation."""
     log_message("\n================ BACKUP SUMMARY ================")
     log_message(f"Source Directory: {SOURCE_DIR}")
@@ -108,6 +323,12 @@ def generate_summary(success_local, success_remote):
     log_message(f"Local Backup Status: {'✅ Success' if success_local else '❌ Failed'}")
     if REMOTE_ENABLED:
         log_message(f"Remote Upload Status: {'✅ Success' if success_remote else '❌ Failed'}")
+    if governor is not None:
+        summary = governor.summary()
+        log_message(f"Throttled: {summary['throttled_sec']:.2f} sec "
+                    f"({summary['backoffs']} adaptive back-offs)")
+        log_message(f"Effective Read: {summary['read_mbps']:.2f} MB/s | "
+                    f"Effective Upload: {summary['upload_mbps']:.2f} MB/s")
     log_message("===============================================\n")
 
 
@@ -118,17 +339,31 @@ def generate_summary(success_local, success_remote):
 def main():
     log_message("🚀 Automated Backup Process Initiated")
     log_message(f"Timestamp: {TIMESTAMP}")
+    started_at = time.time()
+    stats = {}
+    metrics = backup_metrics.RunMetrics()
+    
+    governor = None
+    if GOVERNOR_ENABLED:
+        governor = ResourceGovernor(**GOVERNOR_CONFIG)
+        log_message("🐢 Low-priority mode: " + ", ".join(governor.lower_priority()))
     
     # Step 1: Create backup
-    success_local = create_backup(SOURCE_DIR, LOCAL_BACKUP_PATH)
+    success_local = create_backup(SOURCE_DIR, LOCAL_BACKUP_PATH, stats, governor, metrics)
     
     # Step 2: Upload to remote if enabled
     success_remote = False
     if REMOTE_ENABLED and success_local:
-        success_remote = upload_backup_scp(LOCAL_BACKUP_PATH, REMOTE_CONFIG)
+        success_remote = upload_backup_scp(LOCAL_BACKUP_PATH, REMOTE_CONFIG, governor, metrics)
+    
+    # Step 3: Record run in the backup catalog
+    record_in_catalog(stats, started_at, success_local, success_remote)
+    
+    # Step 4: Append structured metrics record
+    record_metrics(metrics, governor)
     
-    # Step 3: Generate summary
-    generate_summary(success_local, success_remote)
+    # Step 5: Generate summary
+    generate_summary(success_local, success_remote, governor)
     
     if success_local and (success_remote or not REMOTE_ENABLED):
         log_message("🎉 Backup process completed successfully.")
@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+"""
+Backup Catalog
+--------------
+Indexed SQLite catalog of every backup run created by automated_backup.py.
+Each run records its metadata (source, archive, sizes, timings, status) and
+the full per-file listing (path, mtime, size, SHA-256), so questions such as
+"which backup holds file X as it was at time T" are answered by an index
+lookup instead of opening archives one by one.
+
+Usage:
+    python backup_catalog.py history ImportantData/report.xlsx --at "2025-11-12 21:00"
+    python backup_catalog.py latest
+    python backup_catalog.py usage --days 1 7 30
+"""
+
+import argparse
+import datetime
+import sqlite3
+import time
+
+# ----------------------------
+# CONFIGURATION
+# ----------------------------
+
+CATALOG_FILE = "backup_catalog.db"
+
+# Paths are stored once in `paths` and referenced by id, so a file that is
+# present in thousands of runs costs one text row plus small integer rows.
+# `files` is clustered on (path_id, run_id), which makes a file's history a
+# single range scan.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id            INTEGER PRIMARY KEY,
+    timestamp     TEXT    NOT NULL,
+    source_dir    TEXT    NOT NULL,
+    backup_path   TEXT    NOT NULL,
+    started_at    REAL    NOT NULL,
+    finished_at   REAL    NOT NULL,
+    elapsed       REAL    NOT NULL,
+    status        TEXT    NOT NULL,
+    remote_status TEXT    NOT NULL,
+    file_count    INTEGER NOT NULL,
+    source_bytes  INTEGER NOT NULL,
+    archive_bytes INTEGER NOT NULL,
+    error         TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_runs_started ON runs (started_at, archive_bytes);
+CREATE INDEX IF NOT EXISTS idx_runs_status ON runs (status, started_at);
+
+CREATE TABLE IF NOT EXISTS paths (
+    id   INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS files (
+    path_id INTEGER NOT NULL REFERENCES paths (id),
+    run_id  INTEGER NOT NULL REFERENCES runs (id),
+    mtime   INTEGER NOT NULL,
+    size    INTEGER NOT NULL,
+    sha256  BLOB,
+    PRIMARY KEY (path_id, run_id)
+) WITHOUT ROWID;
+"""
+
+
+# ----------------------------
+# CATALOG ACCESS
+# ----------------------------
+
+def connect(catalog_file=CATALOG_FILE):
+    """Opens the catalog, creating the schema on first use."""
+    conn = sqlite3.connect(catalog_file)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def record_run(conn, run, files):
+    """
+    Stores one backup run and its file listing in a single transaction.
+
+    `run` holds the columns of the `runs` table (without `id`); `files` is an
+    iterable of (path, mtime, size, sha256_hex) tuples. Returns the run id.
+    """
+    with conn:
+        cursor = conn.execute(
+            """
+            INSERT INTO runs (timestamp, source_dir, backup_path, started_at,
+                              finished_at, elapsed, status, remote_status,
+                              file_count, source_bytes, archive_bytes, error)
+            VALUES (:timestamp, :source_dir, :backup_path, :started_at,
+                    :finished_at, :elapsed, :status, :remote_status,
+                    :file_count, :source_bytes, :archive_bytes, :error)
+            """,
+            run,
+        )
+        run_id = cursor.lastrowid
+        files = list(files)
+        conn.executemany("INSERT OR IGNORE INTO paths (path) VALUES (?)",
+                         ((path,) for path, _, _, _ in files))
+        conn.executemany(
+            """
+            INSERT INTO files (path_id, run_id, mtime, size, sha256)
+            VALUES ((SELECT id FROM paths WHERE path = ?), ?, ?, ?, ?)
+            """,
+            ((path, run_id, int(mtime), size, bytes.fromhex(digest) if digest else None)
+             for path, mtime, size, digest in files),
+        )
+    return run_id
+
+
+def file_history(conn, path, at=None):
+    """
+    Returns every successful run containing `path`, newest first.
+
+    When `at` (epoch seconds) is given, only runs started at or before that
+    moment are returned, so the first row is the backup holding the file
+    as it was at time `at`.
+    """
+    at = time.time() if at is None else at
+    return conn.execute(
+        """
+        SELECT r.id, r.timestamp, r.backup_path, r.started_at,
+               f.mtime, f.size, hex(f.sha256) AS sha256
+        FROM paths p
+        JOIN files f ON f.path_id = p.id
+        JOIN runs r ON r.id = f.run_id
+        WHERE p.path = ? AND r.status = 'success' AND r.started_at <= ?
+        ORDER BY r.started_at DESC
+        """,
+        (path, at),
+    ).fetchall()
+
+
+def latest_good_backup(conn):
+    """Returns the most recent successful run, or None."""
+    return conn.execute(
+        """
+        SELECT * FROM runs
+        WHERE status = 'success'
+        ORDER BY started_at DESC
+        LIMIT 1
+        """
+    ).fetchone()
+
+
+def space_used(conn, days, now=None):
+    """Returns (run_count, archive_bytes) of successful runs in the last `days` days."""
+    now = time.time() if now is None else now
+    row = conn.execute(
+        """
+        SELECT count(*), coalesce(sum(archive_bytes), 0) FROM runs
+        WHERE status = 'success' AND started_at >= ?
+        """,
+        (now - days * 86400,),
+    ).fetchone()
+    return row[0], row[1]
+
+
+# ----------------------------
+# COMMAND LINE
+# ----------------------------
+
+def parse_time(value):
+    """Parses 'YYYY-MM-DD[ HH:MM[:SS]]' into epoch seconds."""
+    return datetime.datetime.fromisoformat(value).timestamp()
+
+
+def format_time(epoch):
+    return datetime.datetime.fromtimestamp(epoch).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query the backup catalog.")
+    parser.add_argument("--catalog", default=CATALOG_FILE, help="catalog database file")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    history = commands.add_parser("history", help="list backups containing a file")
+    history.add_argument("path", help="archive path, e.g. ImportantData/report.xlsx")
+    history.add_argument("--at", type=parse_time, help="only backups taken at or before this time")
+
+    commands.add_parser("latest", help="show the latest successful backup")
+
+    usage = commands.add_parser("usage", help="space used per retention window")
+    usage.add_argument("--days", type=int, nargs="+", default=[1, 7, 30, 365])
+
+    args = parser.parse_args(argv)
+    conn = connect(args.catalog)
+    start = time.perf_counter()
+
+    if args.command == "history":
+        rows = file_history(conn, args.path, args.at)
+        if not rows:
+            print(f"❌ No backup contains '{args.path}'")
+        for row in rows:
+            print(f"{format_time(row['started_at'])} | {row['backup_path']} | "
+                  f"mtime={format_time(row['mtime'])} | {row['size']} bytes | "
+                  f"sha256={(row['sha256'] or '-').lower()}")
+    elif args.command == "latest":
+        row = latest_good_backup(conn)
+        if row is None:
+            print("❌ No successful backup recorded")
+        else:
+            print(f"✅ {row['backup_path']} ({format_time(row['started_at'])})")
+            print(f"   Files: {row['file_count']} | Source: {row['source_bytes'] / (1024 * 1024):.2f} MB"
+                  f" | Archive: {row['archive_bytes'] / (1024 * 1024):.2f} MB"
+                  f" | Time taken: {row['elapsed']:.2f} sec")
+    elif args.command == "usage":
+        for days in args.days:
+            count, total = space_used(conn, days)
+            print(f"Last {days:>4} day(s): {count} backup(s), {total / (1024 * 1024):.2f} MB")
+
+    print(f"⏱️ Query answered in {(time.perf_counter() - start) * 1000:.1f} ms")
+    conn.close()
+
+
+# ----------------------------
+# ENTRY POINT
+# ----------------------------
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+"""
+Backup Resource Governor
+------------------------
+Keeps automated_backup.py from starving co-located production workloads.
+
+- Token-bucket limits on read MB/s (source files) and upload MB/s (SFTP).
+- Lower CPU and I/O priority for the backup process.
+- Adaptive mode: when the load average or disk latency goes above a
+  threshold, the effective rates are backed off until the host recovers.
+
+The governor records how long the backup was throttled and the effective
+throughput it achieved on each channel.
+"""
+
+import os
+import sys
+import time
+
+try:
+    import psutil
+except ImportError:  # psutil is optional: I/O priority and disk latency need it
+    psutil = None
+
+MB = 1024 * 1024
+
+# ----------------------------
+# TOKEN BUCKET
+# ----------------------------
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` bytes/sec refill, up to `burst` bytes banked."""
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else rate)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    def consume(self, amount, factor=1.0):
+        """
+        Takes `amount` tokens, sleeping until enough have accumulated.
+        `factor` scales the refill rate (adaptive back-off). Returns the
+        number of seconds slept.
+        """
+        rate = self.rate * factor
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * rate)
+        self.updated = now
+        self.tokens -= amount
+        if self.tokens >= 0:
+            return 0.0
+        delay = -self.tokens / rate
+        time.sleep(delay)
+        self.updated = time.monotonic()
+        self.tokens = 0.0
+        return delay
+
+
+# ----------------------------
+# GOVERNOR
+# ----------------------------
+
+
+class ChannelStats:
+    """Bytes moved and time spent throttled on one channel (read/upload)."""
+
+    def __init__(self):
+        self.bytes = 0
+        self.throttled = 0.0
+        self.first = None
+        self.last = None
+
+    def add(self, amount, throttled):
+        now = time.monotonic()
+        if self.first is None:
+            self.first = now
+        self.last = now
+        self.bytes += amount
+        self.throttled += throttled
+
+    def throughput(self):
+        """Effective MB/s between the first and last transfer."""
+        if self.first is None or self.last <= self.first:
+            return 0.0
+        return self.bytes / MB / (self.last - self.first)
+
+
+class ResourceGovernor:
+    """Rate limits, priorities and adaptive back-off for one backup run."""
+
+    def __init__(self, read_mbps=None, upload_mbps=None, cpu_nice=10, io_nice=True,
+                 adaptive=True, max_load_per_cpu=1.0, max_disk_latency_ms=50,
+                 check_interval=1.0, backoff=0.5, min_factor=0.1, pause=0.1):
+        self.read_bucket = TokenBucket(read_mbps * MB) if read_mbps else None
+        self.upload_bucket = TokenBucket(upload_mbps * MB) if upload_mbps else None
+        self.cpu_nice = cpu_nice
+        self.io_nice = io_nice
+        self.adaptive = adaptive
+        self.max_load_per_cpu = max_load_per_cpu
+        self.max_disk_latency_ms = max_disk_latency_ms
+        self.check_interval = check_interval
+        self.backoff = backoff
+        self.min_factor = min_factor
+        self.pause = pause
+
+        self.factor = 1.0
+        self.backoffs = 0
+        self.adaptive_throttled = 0.0
+        self.read = ChannelStats()
+        self.upload = ChannelStats()
+        self._last_check = time.monotonic()
+        self._last_disk = self._disk_counters()
+
+    # ---------- priorities ----------
+
+    def lower_priority(self):
+        """Lowers CPU and I/O priority of the current process. Returns notes for the log."""
+        notes = []
+        try:
+            if sys.platform == "win32":
+                if psutil is None:
+                    raise OSError("psutil not installed")
+                psutil.Process().nice(psutil.BELOW_NORMAL_PRIORITY_CLASS)
+                notes.append("CPU priority: below normal")
+            elif self.cpu_nice:
+                notes.append(f"CPU nice: {os.nice(self.cpu_nice)}")
+        except OSError as e:
+            notes.append(f"CPU priority unchanged ({e})")
+
+        if self.io_nice:
+            if psutil is None:
+                notes.append("I/O priority unchanged (psutil not installed)")
+            else:
+                try:
+                    if sys.platform == "win32":
+                        psutil.Process().ionice(psutil.IOPRIO_VERYLOW)
+                    else:
+                        psutil.Process().ionice(psutil.IOPRIO_CLASS_IDLE)
+                    notes.append("I/O priority: idle")
+                except (AttributeError, OSError, psutil.Error) as e:
+                    notes.append(f"I/O priority unchanged ({e})")
+        return notes
+
+    # ---------- throttling ----------
+
+    def throttle_read(self, amount):
+        """Accounts for `amount` bytes read from the source, sleeping if needed."""
+        self.read.add(amount, self._throttle(self.read_bucket, amount))
+
+    def throttle_upload(self, amount):
+        """Accounts for `amount` bytes uploaded, sleeping if needed."""
+        self.upload.add(amount, self._throttle(self.upload_bucket, amount))
+
+    def _throttle(self, bucket, amount):
+        slept = self._adapt()
+        if bucket is not None:
+            slept += bucket.consume(amount, self.factor)
+        return slept
+
+    # ---------- adaptive back-off ----------
+
+    def _adapt(self):
+        """Re-evaluates host pressure every `check_interval` seconds."""
+        if not self.adaptive:
+            return 0.0
+        now = time.monotonic()
+        if now - self._last_check < self.check_interval:
+            return 0.0
+        self._last_check = now
+
+        if self._overloaded():
+            self.factor = max(self.min_factor, self.factor * self.backoff)
+            self.backoffs += 1
+            # Also yield briefly, so back-off works even when no rate is configured
+            time.sleep(self.pause)
+            self.adaptive_throttled += self.pause
+            return self.pause
+        self.factor = min(1.0, self.factor / self.backoff)
+        return 0.0
+
+    def _overloaded(self):
+        load = self.load_per_cpu()
+        latency = self.disk_latency_ms()
+        return load > self.max_load_per_cpu or latency > self.max_disk_latency_ms
+
+    def load_per_cpu(self):
+        """1-minute load average divided by CPU count (0 where unsupported)."""
+        if not hasattr(os, "getloadavg"):
+            return 0.0
+        return os.getloadavg()[0] / (os.cpu_count() or 1)
+
+    def disk_latency_ms(self):
+        """Average ms per disk I/O since the previous call (0 without psutil)."""
+        current = self._disk_counters()
+        previous, self._last_disk = self._last_disk, current
+        if current is None or previous is None:
+            return 0.0
+        ops = (current.read_count + current.write_count
+               - previous.read_count - previous.write_count)
+        busy = (current.read_time + current.write_time
+                - previous.read_time - previous.write_time)
+        return busy / ops if ops > 0 else 0.0
+
+    @staticmethod
+    def _disk_counters():
+        if psutil is None:
+            return None
+        try:
+            return psutil.disk_io_counters()
+        except (RuntimeError, OSError):
+            return None
+
+    # ---------- reporting ----------
+
+    def throttled_seconds(self):
+        """Total time spent sleeping on rate limits and adaptive back-off."""
+        return self.read.throttled + self.upload.throttled
+
+    def summary(self):
+        """Returns the governor's results as a dict."""
+        return {
+            "throttled_sec": round(self.throttled_seconds(), 3),
+            "adaptive_throttled_sec": round(self.adaptive_throttled, 3),
+            "backoffs": self.backoffs,
+            "read_mb": round(self.read.bytes / MB, 3),
+            "read_mbps": round(self.read.throughput(), 3),
+            "upload_mb": round(self.upload.bytes / MB, 3),
+            "upload_mbps": round(self.upload.throughput(), 3),
+        }
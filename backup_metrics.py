@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""
+Backup Run Metrics
+------------------
+Structured per-phase metrics for automated_backup.py. Every run appends one
+JSON object to a JSON-lines file with scan, read, compress, write and upload
+durations, bytes in and out, compression ratio, MB/s per phase, peak RSS and
+the failure reason, ready for capacity planning.
+
+Usage:
+    python backup_metrics.py compare                  # latest run vs. previous runs
+    python backup_metrics.py compare --baseline 10 --threshold 0.2
+"""
+
+import argparse
+import datetime
+import json
+import statistics
+import sys
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# ----------------------------
+# CONFIGURATION
+# ----------------------------
+
+METRICS_FILE = "backup_metrics.jsonl"
+PHASES = ("scan", "read", "compress", "write", "upload")
+MB = 1024 * 1024
+
+
+# ----------------------------
+# METRICS COLLECTION
+# ----------------------------
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB, or None if unavailable."""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS and in KB elsewhere
+        return peak / MB if sys.platform == "darwin" else peak / 1024
+    try:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / MB
+    except (ImportError, AttributeError):
+        return None
+
+
+class RunMetrics:
+    """Accumulates phase durations and byte counts for one backup run."""
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.durations = dict.fromkeys(PHASES, 0.0)
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.bytes_uploaded = 0
+        self.files = 0
+        self.throttled = 0.0
+        self.failure = None
+
+    def add(self, name, seconds):
+        """Adds `seconds` to phase `name`."""
+        self.durations[name] += seconds
+
+    def fail(self, reason):
+        """Records the first failure reason of the run."""
+        if self.failure is None:
+            self.failure = reason
+
+    def throughput(self):
+        """MB/s per phase, based on the bytes each phase processes."""
+        phase_bytes = {
+            "read": self.bytes_in,
+            "compress": self.bytes_in,
+            "write": self.bytes_out,
+            "upload": self.bytes_uploaded,
+        }
+        return {
+            name: round(amount / MB / self.durations[name], 3) if self.durations[name] > 0 else None
+            for name, amount in phase_bytes.items()
+        }
+
+    def record(self, **extra):
+        """Returns the run as a JSON-serialisable dict; `extra` fields are merged in."""
+        finished_at = time.time()
+        rss = peak_rss_mb()
+        record = {
+            "started_at": datetime.datetime.fromtimestamp(self.started_at).isoformat(timespec="seconds"),
+            "elapsed_sec": round(finished_at - self.started_at, 3),
+            "status": "failed" if self.failure else "success",
+            "failure": self.failure,
+            "files": self.files,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "bytes_uploaded": self.bytes_uploaded,
+            "compression_ratio": round(self.bytes_in / self.bytes_out, 3) if self.bytes_out else None,
+            "durations_sec": {name: round(value, 4) for name, value in self.durations.items()},
+            "mbps": self.throughput(),
+            "throttled_sec": round(self.throttled, 3),
+            "peak_rss_mb": round(rss, 1) if rss is not None else None,
+        }
+        record.update(extra)
+        return record
+
+
+def write_record(record, metrics_file=METRICS_FILE):
+    """Appends one run record to the JSON-lines file."""
+    with open(metrics_file, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def load_records(metrics_file=METRICS_FILE):
+    """Reads all run records, skipping blank or truncated lines. No file means no runs yet."""
+    records = []
+    try:
+        with open(metrics_file, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+    except FileNotFoundError:
+        pass
+    return records
+
+
+# ----------------------------
+# REGRESSION CHECK
+# ----------------------------
+
+def find_regressions(current, baseline_runs, threshold=0.2):
+    """
+    Compares the MB/s of each phase in `current` with the median of
+    `baseline_runs`. Returns (phase, baseline_mbps, current_mbps, change)
+    for every phase that dropped by more than `threshold` (0.2 = 20%).
+    """
+    regressions = []
+    for name, value in current["mbps"].items():
+        history = [run["mbps"][name] for run in baseline_runs if run["mbps"].get(name)]
+        if value is None or not history:
+            continue
+        baseline = statistics.median(history)
+        change = (value - baseline) / baseline
+        if change < -threshold:
+            regressions.append((name, baseline, value, change))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backup run metrics tools.")
+    parser.add_argument("--metrics", default=METRICS_FILE, help="JSON-lines metrics file")
+    commands = parser.add_subparsers(dest="command", required=True)
+    compare = commands.add_parser("compare", help="flag throughput regressions of the latest run")
+    compare.add_argument("--baseline", type=int, default=5, help="number of previous runs to compare against")
+    compare.add_argument("--threshold", type=float, default=0.2, help="allowed MB/s drop (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    runs = [run for run in load_records(args.metrics) if run.get("status") == "success"]
+    if len(runs) < 2:
+        print("⚠️ Need at least two successful runs to compare.")
+        return 0
+
+    current, baseline_runs = runs[-1], runs[-1 - args.baseline:-1]
+    print(f"📊 Comparing run {current['started_at']} against {len(baseline_runs)} previous run(s)")
+    regressions = find_regressions(current, baseline_runs, args.threshold)
+    for name, baseline, value, change in regressions:
+        print(f"   ⚠️ {name:<8} {baseline:8.2f} MB/s -> {value:8.2f} MB/s ({change:+.0%})")
+    if not regressions:
+        print("   ✅ No throughput regressions")
+    return 1 if regressions else 0
+
+
+# ----------------------------
+# ENTRY POINT
+# ----------------------------
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+"""
+Browser Resource Profiler
+-------------------------
+Background profiler for AccuKnox_Automation.py. While the Playwright run is
+in progress it samples CPU and RSS of the Python process, the Playwright
+driver and the Chromium process tree (reusing health_sampler.ProcessTable),
+and tags every sample with the `execute_*` step currently running.
+
+The report shows per-step resource cost next to step latency and estimates
+how many browsers one runner can host in parallel.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import psutil
+
+from health_sampler import ProcessTable
+
+# ----------------------------
+# CONFIGURATION
+# ----------------------------
+
+SAMPLE_INTERVAL = 0.5            # seconds between samples
+TARGET_UTILIZATION = 0.8         # share of runner CPU/RAM the browsers may use
+BROWSER_NAMES = ("chrom", "headless_shell", "msedge")
+GROUPS = ("python", "driver", "browser")
+SETUP_STEP = "(setup)"
+MB = 1024 * 1024
+
+
+class StepStats:
+    """Latency and resource samples of one step."""
+
+    def __init__(self, name):
+        self.name = name
+        self.latency = 0.0
+        self.samples = 0
+        self.cpu_total = dict.fromkeys(GROUPS, 0.0)
+        self.cpu_peak = dict.fromkeys(GROUPS, 0.0)
+        self.rss_peak = dict.fromkeys(GROUPS, 0)
+
+    def add(self, cpu, rss):
+        self.samples += 1
+        for group in GROUPS:
+            self.cpu_total[group] += cpu[group]
+            self.cpu_peak[group] = max(self.cpu_peak[group], cpu[group])
+            self.rss_peak[group] = max(self.rss_peak[group], rss[group])
+
+    def cpu_avg(self, group):
+        return self.cpu_total[group] / self.samples if self.samples else 0.0
+
+    def as_dict(self):
+        return {
+            "step": self.name,
+            "latency_sec": round(self.latency, 3),
+            "samples": self.samples,
+            "cpu_avg": {group: round(self.cpu_avg(group), 1) for group in GROUPS},
+            "cpu_peak": {group: round(self.cpu_peak[group], 1) for group in GROUPS},
+            "rss_peak_mb": {group: round(self.rss_peak[group] / MB, 1) for group in GROUPS},
+        }
+
+
+class BrowserProfiler:
+    """
+    Samples this process and its child tree in a background thread.
+
+    Use as a context manager around the Playwright session, and wrap each
+    step with `step(name)` or `run(func, *args)`. When `enabled` is False the
+    profiler only measures step latency and prints no report.
+    """
+
+    def __init__(self, interval=SAMPLE_INTERVAL, enabled=True, report_file=None):
+        self.interval = interval
+        self.enabled = enabled
+        self.report_file = report_file
+        self.root = psutil.Process(os.getpid())
+        self.table = ProcessTable()
+        self.current_step = SETUP_STEP
+        self.steps = {SETUP_STEP: StepStats(SETUP_STEP)}
+        self._stop = threading.Event()
+        self._thread = None
+
+    # ---------- lifecycle ----------
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        self.report()
+        return False
+
+    def start(self):
+        if not self.enabled or self._thread is not None:
+            return
+        self.table.refresh(self._tree_pids())
+        self._thread = threading.Thread(target=self._run, name="browser-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    # ---------- step tagging ----------
+
+    @contextmanager
+    def step(self, name):
+        """Tags samples taken inside the block with `name` and times the block."""
+        stats = self.steps.setdefault(name, StepStats(name))
+        previous, self.current_step = self.current_step, name
+        start = time.perf_counter()
+        try:
+            yield stats
+        finally:
+            stats.latency += time.perf_counter() - start
+            self.current_step = previous
+
+    def run(self, func, *args, **kwargs):
+        """Calls `func` as a step named after it and returns its result."""
+        with self.step(func.__name__):
+            return func(*args, **kwargs)
+
+    # ---------- sampling ----------
+
+    def _tree_pids(self):
+        try:
+            return [self.root.pid] + [child.pid for child in self.root.children(recursive=True)]
+        except psutil.Error:
+            return [self.root.pid]
+
+    def _group(self, pid):
+        if pid == self.root.pid:
+            return "python"
+        name = self.table.name(pid).lower()
+        return "browser" if any(part in name for part in BROWSER_NAMES) else "driver"
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            step = self.current_step
+            cpu = dict.fromkeys(GROUPS, 0.0)
+            rss = dict.fromkeys(GROUPS, 0)
+            for proc_cpu, pid, proc_rss in self.table.read(memory=True):
+                group = self._group(pid)
+                cpu[group] += proc_cpu
+                rss[group] += proc_rss
+            self.steps[step].add(cpu, rss)
+            self.table.refresh(self._tree_pids())
+
+    # ---------- reporting ----------
+
+    def capacity_estimate(self):
+        """Estimated parallel browsers per runner, limited by CPU and by memory."""
+        measured = [s for s in self.steps.values() if s.samples]
+        if not measured:
+            return None
+        samples = sum(s.samples for s in measured)
+        cpu_per_browser = sum(s.cpu_total["driver"] + s.cpu_total["browser"] for s in measured) / samples
+        rss_per_browser = max(s.rss_peak["driver"] + s.rss_peak["browser"] for s in measured)
+        cpu_capacity = (psutil.cpu_count() or 1) * 100 * TARGET_UTILIZATION
+        mem_capacity = psutil.virtual_memory().total * TARGET_UTILIZATION
+        by_cpu = int(cpu_capacity // cpu_per_browser) if cpu_per_browser > 0 else None
+        by_memory = int(mem_capacity // rss_per_browser) if rss_per_browser > 0 else None
+        limits = [n for n in (by_cpu, by_memory) if n is not None]
+        return {
+            "cpu_per_browser": round(cpu_per_browser, 1),
+            "rss_per_browser_mb": round(rss_per_browser / MB, 1),
+            "by_cpu": by_cpu,
+            "by_memory": by_memory,
+            "browsers_per_runner": min(limits) if limits else None,
+        }
+
+    def report(self):
+        """Prints per-step latency and resource cost, and saves it as JSON if configured."""
+        if not self.enabled:
+            return None
+        steps = [s for s in self.steps.values() if s.samples or s.name != SETUP_STEP]
+        print("\n" + "="*70)
+        print("🧮 RESOURCE PROFILE PER STEP (CPU % avg, Chromium CPU % peak, RSS MB peak)")
+        print("="*70)
+        print(f"{'Step':<30} {'Latency':>8} {'Py CPU':>7} {'Py MB':>6} {'Drv CPU':>7} {'Drv MB':>6} "
+              f"{'Chr CPU':>7} {'Chr Pk':>6} {'Chr MB':>6}")
+        for s in steps:
+            print(f"{s.name:<30} {s.latency:>7.2f}s "
+                  f"{s.cpu_avg('python'):>7.1f} {s.rss_peak['python'] / MB:>6.0f} "
+                  f"{s.cpu_avg('driver'):>7.1f} {s.rss_peak['driver'] / MB:>6.0f} "
+                  f"{s.cpu_avg('browser'):>7.1f} {s.cpu_peak['browser']:>6.0f} "
+                  f"{s.rss_peak['browser'] / MB:>6.0f}")
+
+        estimate = self.capacity_estimate()
+        if estimate:
+            print(f"\n🖥️ Per browser: {estimate['cpu_per_browser']}% CPU avg, "
+                  f"{estimate['rss_per_browser_mb']} MB RSS peak (driver + Chromium)")
+            print(f"🖥️ Estimated parallel browsers per runner: {estimate['browsers_per_runner']} "
+                  f"(CPU-bound: {estimate['by_cpu']}, memory-bound: {estimate['by_memory']})")
+        print("="*70 + "\n")
+
+        report = {"steps": [s.as_dict() for s in steps], "capacity": estimate}
+        if self.report_file:
+            with open(self.report_file, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+        return report
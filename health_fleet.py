@@ -0,0 +1,399 @@
+# -*- coding: utf-8 -*-
+"""
+Fleet Health Monitoring: Agent / Collector
+------------------------------------------
+Central view of system_health_monitor metrics across many hosts.
+
+- agent:     samples cpu, memory, disk and the top-N processes every interval
+             and sends them to a collector as compact binary packets (UDP or TCP).
+- collector: asyncio server that ingests packets, keeps the latest state and a
+             short history per host, and evaluates THRESHOLDS fleet-wide.
+- simulate:  runs many fake agents from one process, for testing on localhost.
+
+Usage:
+    python health_fleet.py collector --port 9999
+    python health_fleet.py agent --collector 10.0.0.5 --port 9999
+    python health_fleet.py simulate --agents 2000 --interval 1
+"""
+
+import argparse
+import asyncio
+import datetime
+import random
+import socket
+import struct
+import time
+from collections import deque, namedtuple
+
+import psutil
+
+from health_sampler import ProcessSampler
+from log_writer import get_writer
+from system_health_monitor import MONITOR_INTERVAL, THRESHOLDS, LOG_OPTIONS
+
+# ----------------------------
+# CONFIGURATION
+# ----------------------------
+
+COLLECTOR_PORT = 9999
+FLEET_LOG_FILE = "fleet_health_log.txt"
+HISTORY_LENGTH = 60       # samples kept per host
+EVALUATE_INTERVAL = 10    # seconds between fleet-wide threshold checks
+STALE_AFTER = 30          # seconds without a sample before a host is stale
+EVICT_AFTER = 10 * STALE_AFTER  # seconds without a sample before a host is forgotten
+MAX_ALERT_LINES = 20      # per evaluation, to keep the log readable
+
+# ----------------------------
+# WIRE FORMAT
+# ----------------------------
+# Header: magic, version, process count, host name length, timestamp,
+# cpu %, memory %, disk %; then the host name and, per process:
+# pid, cpu %, name length, name. Process names are cut to 32 bytes.
+
+MAGIC = b"HF"
+VERSION = 1
+HEADER = struct.Struct("!2sBBBdfff")
+PROCESS = struct.Struct("!IfB")
+FRAME = struct.Struct("!H")   # TCP length prefix
+MAX_NAME = 32
+
+FleetSample = namedtuple("FleetSample", "host timestamp cpu memory disk top")
+
+
+def encode_sample(sample):
+    """Packs a FleetSample into bytes."""
+    host = sample.host.encode("utf-8")[:255]
+    top = sample.top[:255]
+    parts = [HEADER.pack(MAGIC, VERSION, len(top), len(host), sample.timestamp,
+                         sample.cpu, sample.memory, sample.disk), host]
+    for pid, name, cpu in top:
+        name = name.encode("utf-8")[:MAX_NAME]
+        parts.append(PROCESS.pack(pid, cpu, len(name)))
+        parts.append(name)
+    return b"".join(parts)
+
+
+def decode_sample(payload):
+    """Unpacks bytes into a FleetSample; raises ValueError on malformed input."""
+    try:
+        magic, version, count, host_len, timestamp, cpu, memory, disk = HEADER.unpack_from(payload)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("not a fleet sample")
+        offset = HEADER.size
+        host = payload[offset:offset + host_len].decode("utf-8", "replace")
+        offset += host_len
+        top = []
+        for _ in range(count):
+            pid, proc_cpu, name_len = PROCESS.unpack_from(payload, offset)
+            offset += PROCESS.size
+            name = payload[offset:offset + name_len].decode("utf-8", "ignore")
+            offset += name_len
+            top.append((pid, name, round(proc_cpu, 1)))
+    except struct.error as e:
+        raise ValueError(f"truncated sample: {e}") from e
+    return FleetSample(host, timestamp, round(cpu, 1), round(memory, 1), round(disk, 1), top)
+
+
+# ----------------------------
+# UTILITY FUNCTIONS
+# ----------------------------
+
+def log_message(message):
+    """Logs message to console and fleet log file."""
+    timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    formatted = f"[{timestamp}] {message}"
+    print(formatted)
+    get_writer(FLEET_LOG_FILE, **LOG_OPTIONS).write(formatted + "\n")
+
+
+def open_sender(collector, port, protocol):
+    """Returns a send(bytes) function for the chosen protocol."""
+    if protocol == "udp":
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        return lambda payload: sock.sendto(payload, (collector, port))
+    sock = socket.create_connection((collector, port))
+    return lambda payload: sock.sendall(FRAME.pack(len(payload)) + payload)
+
+
+# ----------------------------
+# AGENT
+# ----------------------------
+
+def run_agent(collector, port=COLLECTOR_PORT, protocol="udp", interval=MONITOR_INTERVAL, limit=5):
+    """Samples this host and sends a packet to the collector every `interval` seconds."""
+    host = socket.gethostname()
+    sampler = ProcessSampler(limit=limit)
+    send = None
+    log_message(f"📡 Agent '{host}' sending to {collector}:{port} over {protocol.upper()} "
+                f"every {interval}s")
+    next_send = time.monotonic()
+    try:
+        while True:
+            tick = sampler.tick()
+            sample = FleetSample(host, tick.timestamp, tick.cpu,
+                                 psutil.virtual_memory().percent,
+                                 psutil.disk_usage("/").percent, tick.top)
+            try:
+                send = send or open_sender(collector, port, protocol)
+                send(encode_sample(sample))
+            except OSError as e:
+                # Collector restarts must not kill the agent: reconnect next tick
+                log_message(f"❌ Failed to send sample: {e}")
+                send = None
+            next_send += interval
+            now = time.monotonic()
+            if next_send < now:
+                # Slow send or host suspend: skip missed samples instead of bursting
+                next_send = now
+            time.sleep(next_send - now)
+    except KeyboardInterrupt:
+        log_message("🛑 Agent stopped by user.")
+
+
+# ----------------------------
+# COLLECTOR
+# ----------------------------
+
+class HostState:
+    """Latest sample and short history of one host."""
+
+    __slots__ = ("latest", "history", "last_seen")
+
+    def __init__(self):
+        self.latest = None
+        self.history = deque(maxlen=HISTORY_LENGTH)
+        self.last_seen = 0.0
+
+    def averages(self):
+        count = len(self.history)
+        return {
+            "cpu": sum(s[0] for s in self.history) / count,
+            "memory": sum(s[1] for s in self.history) / count,
+            "disk": sum(s[2] for s in self.history) / count,
+        }
+
+
+class FleetCollector:
+    """Ingests agent samples and evaluates thresholds across the fleet."""
+
+    def __init__(self, thresholds=THRESHOLDS, stale_after=STALE_AFTER, evict_after=EVICT_AFTER):
+        self.thresholds = thresholds
+        self.stale_after = stale_after
+        self.evict_after = evict_after
+        self.hosts = {}
+        self.received = 0
+        self.errors = 0
+        self.evicted = 0
+
+    def ingest(self, payload):
+        try:
+            sample = decode_sample(payload)
+        except ValueError:
+            self.errors += 1
+            return None
+        state = self.hosts.get(sample.host)
+        if state is None:
+            state = self.hosts[sample.host] = HostState()
+        state.latest = sample
+        state.history.append((sample.cpu, sample.memory, sample.disk))
+        state.last_seen = time.monotonic()
+        self.received += 1
+        return sample
+
+    def evaluate(self):
+        """
+        Returns (alerts, stale hosts, fleet averages); alerts are (host, [metrics], averages).
+        Hosts silent for longer than `evict_after` are dropped so decommissioned
+        or renamed hosts do not accumulate.
+        """
+        now = time.monotonic()
+        alerts, stale, evicted = [], [], []
+        totals = dict.fromkeys(self.thresholds, 0.0)
+        live = 0
+        for host, state in self.hosts.items():
+            if now - state.last_seen > self.evict_after:
+                evicted.append(host)
+                continue
+            if now - state.last_seen > self.stale_after:
+                stale.append(host)
+                continue
+            live += 1
+            averages = state.averages()
+            for name in totals:
+                totals[name] += averages[name]
+            exceeded = [name for name, limit in self.thresholds.items() if averages[name] > limit]
+            if exceeded:
+                alerts.append((host, exceeded, averages))
+        for host in evicted:
+            del self.hosts[host]
+        self.evicted += len(evicted)
+        fleet = {name: total / live for name, total in totals.items()} if live else {}
+        return alerts, stale, fleet
+
+    def report(self, elapsed):
+        alerts, stale, fleet = self.evaluate()
+        rate = self.received / elapsed if elapsed > 0 else 0.0
+        log_message(f"🌐 Fleet: {len(self.hosts)} hosts | {len(alerts)} alerting | {len(stale)} stale "
+                    f"| {self.evicted} evicted | {rate:.0f} samples/s | {self.errors} bad packets")
+        if fleet:
+            log_message(f"   Fleet avg: CPU {fleet['cpu']:.1f}% | Memory {fleet['memory']:.1f}% "
+                        f"| Disk {fleet['disk']:.1f}%")
+        for host, exceeded, averages in alerts[:MAX_ALERT_LINES]:
+            details = ", ".join(f"{name} {averages[name]:.1f}%" for name in exceeded)
+            log_message(f"   🚨 {host}: {details}")
+        if len(alerts) > MAX_ALERT_LINES:
+            log_message(f"   ... and {len(alerts) - MAX_ALERT_LINES} more alerting hosts")
+        self.received = 0
+        self.evicted = 0
+
+
+class UdpReceiver(asyncio.DatagramProtocol):
+    def __init__(self, collector):
+        self.collector = collector
+
+    def datagram_received(self, data, addr):
+        self.collector.ingest(data)
+
+
+async def serve_collector(bind="0.0.0.0", port=COLLECTOR_PORT, protocols=("udp", "tcp"),
+                          evaluate_interval=EVALUATE_INTERVAL, collector=None, duration=None):
+    """Runs the collector until cancelled (or for `duration` seconds)."""
+    collector = collector or FleetCollector()
+    loop = asyncio.get_running_loop()
+    clients = set()   # connection handler tasks, cancelled on shutdown
+
+    async def handle_tcp(reader, writer):
+        task = asyncio.current_task()
+        clients.add(task)
+        try:
+            while True:
+                (length,) = FRAME.unpack(await reader.readexactly(FRAME.size))
+                collector.ingest(await reader.readexactly(length))
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            pass  # agent disconnected, or the collector is shutting down
+        finally:
+            clients.discard(task)
+            writer.close()
+
+    transport = server = None
+    if "udp" in protocols:
+        transport, _ = await loop.create_datagram_endpoint(
+            lambda: UdpReceiver(collector), local_addr=(bind, port))
+    if "tcp" in protocols:
+        server = await asyncio.start_server(handle_tcp, bind, port, backlog=4096)
+    log_message(f"📥 Collector listening on {bind}:{port} ({', '.join(p.upper() for p in protocols)})")
+
+    started = last = time.monotonic()
+    try:
+        while duration is None or time.monotonic() - started < duration:
+            await asyncio.sleep(evaluate_interval)
+            now = time.monotonic()
+            collector.report(now - last)
+            last = now
+    finally:
+        if transport is not None:
+            transport.close()
+        if server is not None:
+            server.close()
+            # Connected agents never hang up by themselves: drop them first
+            for task in list(clients):
+                task.cancel()
+            await asyncio.gather(*clients, return_exceptions=True)
+            await server.wait_closed()
+    return collector
+
+
+# ----------------------------
+# SIMULATED AGENTS
+# ----------------------------
+
+async def simulate_agent(index, collector, port, protocol, interval, duration, udp=None):
+    """
+    One fake agent sending random but plausible samples. UDP agents send
+    through the shared `udp` transport; TCP agents open their own connection.
+    """
+    host = f"sim-{index:05d}"
+    base = {"cpu": random.uniform(5, 95), "memory": random.uniform(20, 95), "disk": random.uniform(10, 95)}
+    top = [(1000 + i, f"proc-{i}", 0.0) for i in range(5)]
+    if protocol == "udp":
+        transport, send = None, udp.sendto
+    else:
+        _, writer = await asyncio.open_connection(collector, port)
+        transport = writer
+        send = lambda payload: writer.write(FRAME.pack(len(payload)) + payload)
+
+    await asyncio.sleep(random.uniform(0, interval))  # spread agents over the interval
+    end = time.monotonic() + duration
+    while time.monotonic() < end:
+        values = {name: min(100.0, max(0.0, value + random.gauss(0, 3))) for name, value in base.items()}
+        send(encode_sample(FleetSample(host, time.time(), values["cpu"], values["memory"],
+                                       values["disk"], top)))
+        await asyncio.sleep(interval)
+    if transport is not None:
+        transport.close()
+
+
+async def simulate(agents, collector="127.0.0.1", port=COLLECTOR_PORT, protocol="udp",
+                   interval=1.0, duration=30.0):
+    log_message(f"🧪 Simulating {agents} agents -> {collector}:{port} over {protocol.upper()} "
+                f"every {interval}s for {duration}s")
+    udp = None
+    if protocol == "udp":
+        # One socket for all UDP agents: a socket each runs into the open-file limit
+        loop = asyncio.get_running_loop()
+        udp, _ = await loop.create_datagram_endpoint(
+            asyncio.DatagramProtocol, remote_addr=(collector, port))
+    try:
+        await asyncio.gather(*(simulate_agent(i, collector, port, protocol, interval, duration, udp)
+                               for i in range(agents)))
+    finally:
+        if udp is not None:
+            udp.close()
+
+
+# ----------------------------
+# ENTRY POINT
+# ----------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fleet-wide system health monitoring.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    agent = commands.add_parser("agent", help="send this host's samples to a collector")
+    agent.add_argument("--collector", default="127.0.0.1")
+    agent.add_argument("--port", type=int, default=COLLECTOR_PORT)
+    agent.add_argument("--protocol", choices=("udp", "tcp"), default="udp")
+    agent.add_argument("--interval", type=float, default=MONITOR_INTERVAL)
+
+    collector = commands.add_parser("collector", help="ingest samples and evaluate thresholds")
+    collector.add_argument("--bind", default="0.0.0.0")
+    collector.add_argument("--port", type=int, default=COLLECTOR_PORT)
+    collector.add_argument("--protocol", choices=("udp", "tcp", "both"), default="both")
+    collector.add_argument("--evaluate-interval", type=float, default=EVALUATE_INTERVAL)
+    collector.add_argument("--duration", type=float, help="stop after this many seconds")
+
+    sim = commands.add_parser("simulate", help="run simulated agents against a collector")
+    sim.add_argument("--agents", type=int, default=100)
+    sim.add_argument("--collector", default="127.0.0.1")
+    sim.add_argument("--port", type=int, default=COLLECTOR_PORT)
+    sim.add_argument("--protocol", choices=("udp", "tcp"), default="udp")
+    sim.add_argument("--interval", type=float, default=1.0)
+    sim.add_argument("--duration", type=float, default=30.0)
+
+    args = parser.parse_args(argv)
+    try:
+        if args.command == "agent":
+            run_agent(args.collector, args.port, args.protocol, args.interval)
+        elif args.command == "collector":
+            protocols = ("udp", "tcp") if args.protocol == "both" else (args.protocol,)
+            asyncio.run(serve_collector(args.bind, args.port, protocols,
+                                        args.evaluate_interval, duration=args.duration))
+        else:
+            asyncio.run(simulate(args.agents, args.collector, args.port, args.protocol,
+                                 args.interval, args.duration))
+    except KeyboardInterrupt:
+        log_message("🛑 Stopped by user.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+Health Sampler
+--------------
+Non-blocking CPU and process sampler for system_health_monitor.py.
+
+psutil computes CPU percentages as the delta between two calls. Blocking in
+`psutil.cpu_percent(interval=1)` wastes a second per cycle, and creating new
+`Process` objects every cycle makes every per-process reading 0.0. The
+sampler keeps `Process` objects alive between ticks, so each tick is a cheap
+delta against the previous one, and selects the top N with a bounded heap
+instead of sorting every process. Tick overhead is measured, so the monitor
+can report its own cost.
+"""
+
+import heapq
+import time
+from collections import namedtuple
+
+import psutil
+
+# One tick: system CPU %, top [(pid, name, cpu%)], process count and sampling cost
+Sample = namedtuple("Sample", "timestamp cpu top process_count overhead_ms")
+
+PROCESS_ERRORS = (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess)
+
+
+class ProcessTable:
+    """
+    `Process` objects kept alive between reads, so `cpu_percent()` is the
+    delta since the previous read instead of 0.0.
+    """
+
+    def __init__(self):
+        self.processes = {}
+
+    def refresh(self, pids):
+        """Tracks exactly `pids`: new ones are primed, vanished ones dropped."""
+        pids = set(pids)
+        for pid in self.processes.keys() - pids:
+            del self.processes[pid]
+        for pid in pids - self.processes.keys():
+            try:
+                process = psutil.Process(pid)
+                process.cpu_percent(interval=None)  # first call only sets the baseline
+            except PROCESS_ERRORS:
+                continue
+            self.processes[pid] = process
+
+    def read(self, memory=False):
+        """
+        Returns [(cpu%, pid, rss_bytes)] since the previous read; rss is 0
+        unless `memory` is set. Processes that exited are dropped.
+        """
+        readings = []
+        gone = []
+        for pid, process in self.processes.items():
+            try:
+                rss = process.memory_info().rss if memory else 0
+                readings.append((process.cpu_percent(interval=None), pid, rss))
+            except PROCESS_ERRORS:
+                gone.append(pid)
+        for pid in gone:
+            del self.processes[pid]
+        return readings
+
+    def name(self, pid):
+        try:
+            return self.processes[pid].name()
+        except (KeyError,) + PROCESS_ERRORS:
+            return ""
+
+
+class ProcessSampler:
+    """Keeps per-process CPU counters between ticks and samples without blocking."""
+
+    def __init__(self, limit=5, min_interval=0.1):
+        self.limit = limit
+        self.min_interval = min_interval
+        self.table = ProcessTable()
+        self.ticks = 0
+        self.total_overhead = 0.0
+        self.max_overhead = 0.0
+        self.table.refresh(psutil.pids())
+        psutil.cpu_percent(interval=None)
+        self._last_tick = time.monotonic()
+
+    def tick(self, limit=None):
+        """
+        Returns a Sample for the time since the previous tick. Only blocks
+        if called sooner than `min_interval` after the previous tick.
+        """
+        limit = self.limit if limit is None else limit
+        wait = self.min_interval - (time.monotonic() - self._last_tick)
+        if wait > 0:
+            time.sleep(wait)
+
+        start = time.perf_counter()
+        cpu = psutil.cpu_percent(interval=None)
+        readings = self.table.read()
+        top = [(pid, self.table.name(pid), round(proc_cpu, 1))
+               for proc_cpu, pid, _ in heapq.nlargest(limit, readings)]
+        # New processes are primed now and reported from the next tick on
+        self.table.refresh(psutil.pids())
+
+        overhead = time.perf_counter() - start
+        self._last_tick = time.monotonic()
+        self.ticks += 1
+        self.total_overhead += overhead
+        self.max_overhead = max(self.max_overhead, overhead)
+        return Sample(time.time(), cpu, top, len(readings), round(overhead * 1000, 2))
+
+    def overhead_summary(self):
+        """Average and worst tick cost in milliseconds."""
+        average = self.total_overhead / self.ticks if self.ticks else 0.0
+        return {"ticks": self.ticks,
+                "avg_ms": round(average * 1000, 2),
+                "max_ms": round(self.max_overhead * 1000, 2)}
@@ -0,0 +1,309 @@
+# -*- coding: utf-8 -*-
+"""
+Log Query Tool
+--------------
+Time-range queries and aggregates over archived system_health_log.txt and
+backup_report.txt files, without grepping through gigabytes.
+
+Log files are read through mmap. A sparse index maps the timestamp of one
+line every INDEX_STRIDE bytes to its byte offset; it is saved next to the
+log (<log>.idx) together with a fingerprint of the log (inode, mtime and
+first line) and extended incrementally as the log grows; if the log was
+replaced or rewritten, the index is rebuilt. A query bisects the index to
+find the byte range covering the time window and only scans that region.
+
+The health monitor and backup script keep their rotated logs (<log>.1,
+<log>.2, ...) as plain text so they are indexed like the live log.
+Gzip-compressed archives (log_writer.py with compress=True) cannot be
+memory-mapped or indexed: they are decompressed and scanned line by line
+in full on every query, whatever the time window.
+
+Usage:
+    python log_query.py memory system_health_log.txt --since 2025-11-11 --until 2025-11-11
+    python log_query.py backup_time backup_report.txt --since 2025-11-01
+    python log_query.py cpu system_health_log.txt --list
+"""
+
+import argparse
+import bisect
+import datetime
+import gzip
+import json
+import math
+import mmap
+import os
+import re
+import time
+import zlib
+from array import array
+
+# ----------------------------
+# CONFIGURATION
+# ----------------------------
+
+INDEX_STRIDE = 1024 * 1024   # one index entry per MB of log
+INDEX_SUFFIX = ".idx"
+INDEX_VERIFY = 4             # saved entries re-checked against the log on load
+HEAD_BYTES = 4096            # leading bytes of the log covered by the fingerprint
+GZIP_MAGIC = b"\x1f\x8b"
+
+TIMESTAMP_RE = re.compile(rb"\[(\d{4}-\d\d-\d\d \d\d:\d\d:\d\d)\]")
+
+# Metric name -> (line pattern, value group); every pattern captures the
+# timestamp as group 1
+NUMBER = rb"([\d.]+)"
+METRICS = {
+    "cpu": (rb"CPU Usage: " + NUMBER + rb"%", 2),
+    "memory": (rb"Memory Usage: " + NUMBER + rb"%", 2),
+    "memory_gb": (rb"Memory Usage: [\d.]+% \(" + NUMBER + rb" GB used\)", 2),
+    "disk": (rb"Disk Usage: " + NUMBER + rb"%", 2),
+    "disk_gb": (rb"Disk Usage: [\d.]+% \(" + NUMBER + rb" GB used\)", 2),
+    "backup_size": (rb"\s*Size: " + NUMBER + rb" MB \| Time taken: [\d.]+ sec", 2),
+    "backup_time": (rb"\s*Size: [\d.]+ MB \| Time taken: " + NUMBER + rb" sec", 2),
+}
+UNITS = {"cpu": "%", "memory": "%", "memory_gb": " GB", "disk": "%", "disk_gb": " GB",
+         "backup_size": " MB", "backup_time": " sec"}
+
+
+def metric_pattern(metric):
+    pattern, group = METRICS[metric]
+    return re.compile(rb"^\[(\d{4}-\d\d-\d\d \d\d:\d\d:\d\d)\] " + pattern, re.M), group
+
+
+# ----------------------------
+# SPARSE INDEX
+# ----------------------------
+
+def timestamp_at(mm, offset):
+    """Returns the timestamp of the first timestamped line at or after `offset`."""
+    size = len(mm)
+    while offset < size:
+        match = TIMESTAMP_RE.match(mm, offset)
+        if match:
+            return match.group(1).decode(), offset
+        next_line = mm.find(b"\n[", offset)
+        if next_line < 0:
+            break
+        offset = next_line + 1
+    return None, None
+
+
+def build_index(mm, entries=None, stride=INDEX_STRIDE):
+    """
+    Appends (timestamp, offset) entries every `stride` bytes, continuing
+    after the last existing entry. Only reads one line per entry.
+    """
+    entries = [] if entries is None else entries
+    position = entries[-1][1] + stride if entries else 0
+    while position < len(mm):
+        line_start = position
+        if position > 0:
+            newline = mm.find(b"\n", position - 1)
+            if newline < 0:
+                break
+            line_start = newline + 1
+        timestamp, offset = timestamp_at(mm, line_start)
+        if timestamp is None:
+            break
+        entries.append((timestamp, offset))
+        position = offset + stride
+    return entries
+
+
+def fingerprint(path, mm):
+    """Identifies the log file: inode, mtime and a checksum of its first line."""
+    st = os.stat(path)
+    newline = mm.find(b"\n", 0, HEAD_BYTES)
+    head = mm[:newline + 1 if newline >= 0 else HEAD_BYTES]
+    return {"inode": st.st_ino, "mtime": st.st_mtime_ns,
+            "head": zlib.crc32(head), "head_size": len(head)}
+
+
+def index_matches(saved, current, mm, stride):
+    """True if the saved index still describes the (possibly grown) log in `mm`."""
+    if saved["stride"] != stride or saved["size"] > len(mm):
+        return False  # a log that shrank was rotated or rewritten
+    if any(saved["fingerprint"][key] != current[key] for key in ("inode", "head", "head_size")):
+        return False  # replaced by another file, or its beginning was rewritten
+    if saved["size"] == len(mm) and saved["fingerprint"]["mtime"] != current["mtime"]:
+        return False  # rewritten in place without changing size
+    entries = saved["entries"]
+    step = max(1, len(entries) // INDEX_VERIFY)
+    for timestamp, offset in entries[::step] + entries[-1:]:
+        if timestamp_at(mm, offset) != (timestamp, offset):
+            return False
+    return True
+
+
+def load_index(path, mm, stride=INDEX_STRIDE):
+    """Loads the saved index for `path`, extending or rebuilding it as needed."""
+    index_path = path + INDEX_SUFFIX
+    current = fingerprint(path, mm)
+    entries = []
+    saved_size = None
+    try:
+        with open(index_path, encoding="utf-8") as f:
+            saved = json.load(f)
+        saved["entries"] = [tuple(entry) for entry in saved["entries"]]
+        if index_matches(saved, current, mm, stride):
+            entries = saved["entries"]
+            saved_size = saved["size"]
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+
+    if saved_size != len(mm):
+        entries = build_index(mm, entries, stride)
+        try:
+            with open(index_path, "w", encoding="utf-8") as f:
+                json.dump({"size": len(mm), "stride": stride, "fingerprint": current,
+                           "entries": entries}, f)
+        except OSError:
+            pass  # read-only archive: the index just isn't cached
+    return entries
+
+
+def byte_range(entries, size, since=None, until=None):
+    """Byte range of the log that can contain lines between `since` and `until`."""
+    timestamps = [timestamp for timestamp, _ in entries]
+    if timestamps != sorted(timestamps):
+        return 0, size  # clock went backwards somewhere: scan everything
+    start, end = 0, size
+    if since is not None:
+        i = bisect.bisect_left(timestamps, since)
+        if i > 0:
+            start = entries[i - 1][1]
+    if until is not None:
+        i = bisect.bisect_right(timestamps, until)
+        if i < len(entries):
+            end = entries[i][1]
+    return start, end
+
+
+# ----------------------------
+# QUERIES
+# ----------------------------
+
+def query(paths, metric, since=None, until=None, stride=INDEX_STRIDE, collect=None):
+    """
+    Returns (values, stats) for `metric` between `since` and `until`
+    ('YYYY-MM-DD HH:MM:SS' strings) across `paths`. `values` is an array of
+    floats; `stats` reports how many bytes were scanned (all of them for
+    .gz archives). If `collect` is a list, (timestamp, value) pairs are
+    appended to it.
+    """
+    pattern, group = metric_pattern(metric)
+    since_b = since.encode() if since else None
+    until_b = until.encode() if until else None
+    values = array("d")
+    best = {"min": None, "max": None}
+    scanned = total = 0
+
+    def record(matches):
+        for match in matches:
+            timestamp = match.group(1)
+            if (since_b and timestamp < since_b) or (until_b and timestamp > until_b):
+                continue
+            value = float(match.group(group))
+            values.append(value)
+            if best["min"] is None or value < best["min"][1]:
+                best["min"] = (timestamp.decode(), value)
+            if best["max"] is None or value > best["max"][1]:
+                best["max"] = (timestamp.decode(), value)
+            if collect is not None:
+                collect.append((timestamp.decode(), value))
+
+    for path in paths:
+        size = os.path.getsize(path)
+        total += size
+        if size == 0:
+            continue
+        with open(path, "rb") as f:
+            if f.read(len(GZIP_MAGIC)) == GZIP_MAGIC:
+                # Compressed archive: no mmap or index, stream every line
+                f.seek(0)
+                scanned += size
+                with gzip.open(f) as lines:
+                    record(match for match in map(pattern.match, lines) if match)
+                continue
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                entries = load_index(path, mm, stride)
+                start, end = byte_range(entries, size, since, until)
+                scanned += end - start
+                record(pattern.finditer(mm, start, end))
+    return values, {"scanned_bytes": scanned, "total_bytes": total, **best}
+
+
+def percentile(sorted_values, q):
+    """q-th percentile (0-100) of pre-sorted values, linearly interpolated."""
+    if not sorted_values:
+        return None
+    rank = (len(sorted_values) - 1) * q / 100
+    low = math.floor(rank)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+# ----------------------------
+# COMMAND LINE
+# ----------------------------
+
+def normalize_time(value, end_of_day=False):
+    """Accepts 'YYYY-MM-DD[ HH:MM[:SS]]' and returns 'YYYY-MM-DD HH:MM:SS'."""
+    moment = datetime.datetime.fromisoformat(value)
+    if end_of_day and len(value) <= 10:
+        moment = moment.replace(hour=23, minute=59, second=59)
+    return moment.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def until_time(value):
+    """normalize_time() for the end of a window: a bare date means 23:59:59."""
+    return normalize_time(value, end_of_day=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query health and backup logs by time range.")
+    parser.add_argument("metric", choices=sorted(METRICS))
+    parser.add_argument("logs", nargs="+", help="log files (plain text or .gz archives)")
+    parser.add_argument("--since", type=normalize_time,
+                        help="start time, e.g. 2025-11-11 or '2025-11-11 08:00'")
+    parser.add_argument("--until", type=until_time,
+                        help="end time (a bare date means the end of that day)")
+    parser.add_argument("--percentiles", type=float, nargs="+", default=[50, 95, 99])
+    parser.add_argument("--list", action="store_true", help="print every matching sample")
+    args = parser.parse_args(argv)
+
+    since, until = args.since, args.until
+    unit = UNITS[args.metric]
+    samples = [] if args.list else None
+
+    started = time.perf_counter()
+    try:
+        values, stats = query(args.logs, args.metric, since, until, collect=samples)
+    except OSError as e:
+        parser.error(f"cannot read {e.filename}: {e.strerror}")
+    elapsed = time.perf_counter() - started
+
+    for timestamp, value in samples or []:
+        print(f"[{timestamp}] {value}{unit}")
+
+    print(f"📊 {args.metric} from {since or 'start'} to {until or 'end'}")
+    if not values:
+        print("   ❌ No matching samples")
+    else:
+        ordered = sorted(values)
+        print(f"   Samples: {len(values)}")
+        print(f"   Min: {stats['min'][1]}{unit} at {stats['min'][0]}")
+        print(f"   Max: {stats['max'][1]}{unit} at {stats['max'][0]}")
+        print(f"   Avg: {sum(values) / len(values):.2f}{unit}")
+        for q in args.percentiles:
+            print(f"   p{q:g}: {percentile(ordered, q):.2f}{unit}")
+    print(f"⏱️ Scanned {stats['scanned_bytes'] / (1024 * 1024):.1f} of "
+          f"{stats['total_bytes'] / (1024 * 1024):.1f} MB in {elapsed * 1000:.1f} ms")
+
+
+# ----------------------------
+# ENTRY POINT
+# ----------------------------
+
+if __name__ == "__main__":
+    main()
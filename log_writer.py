@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+"""
+Buffered Log Writer
+-------------------
+Shared logging backend for system_health_monitor.py and automated_backup.py.
+
+Instead of opening, appending to and closing the log file for every message,
+callers hand lines to a background writer thread that keeps the file open
+and writes them in batches (on a line count or time limit). Log files are
+rotated by size or age, rotated files can be gzip-compressed, and the queue
+is bounded: when it is full, messages are dropped and counted instead of
+letting memory grow.
+"""
+
+import atexit
+import gzip
+import os
+import queue
+import shutil
+import threading
+import time
+
+# ----------------------------
+# CONFIGURATION
+# ----------------------------
+
+DEFAULT_OPTIONS = {
+    "max_queue": 10000,       # lines buffered before new ones are dropped
+    "batch_size": 256,        # write once this many lines are pending...
+    "flush_interval": 1.0,    # ...or once the oldest pending line is this old (sec)
+    "max_bytes": 10 * 1024 * 1024,  # rotate at this size (None to disable)
+    "rotate_interval": None,  # rotate after this many seconds (None to disable)
+    "backup_count": 5,        # rotated files to keep
+    "compress": True,         # gzip rotated files
+}
+
+_STOP = object()
+
+
+# ----------------------------
+# WRITER
+# ----------------------------
+
+class AsyncLogWriter:
+    """Background thread that appends queued lines to one log file."""
+
+    def __init__(self, path, max_queue=10000, batch_size=256, flush_interval=1.0,
+                 max_bytes=None, rotate_interval=None, backup_count=5, compress=True,
+                 encoding="utf-8"):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.rotate_interval = rotate_interval
+        self.backup_count = backup_count
+        self.compress = compress
+        self.encoding = encoding
+
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.written = 0
+        self.dropped = 0
+        self.reported_dropped = 0
+        self.rotations = 0
+        self.flushes = 0
+
+        self._file = None
+        self._opened_at = None
+        self._thread = threading.Thread(target=self._run, name=f"log-writer:{path}", daemon=True)
+        self._thread.start()
+
+    def write(self, line):
+        """Queues `line` without blocking. Returns False if it had to be dropped."""
+        try:
+            self.queue.put_nowait(line)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def flush(self, timeout=5.0):
+        """Blocks until everything queued so far is written to disk."""
+        done = threading.Event()
+        try:
+            self.queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def close(self, timeout=5.0):
+        """Writes out pending lines and stops the writer thread."""
+        if self._thread.is_alive():
+            self.queue.put(_STOP)
+            self._thread.join(timeout)
+
+    def stats(self):
+        return {"written": self.written, "dropped": self.dropped,
+                "rotations": self.rotations, "flushes": self.flushes}
+
+    # ---------- writer thread ----------
+
+    def _run(self):
+        pending = []
+        first_pending = None
+        while True:
+            timeout = None
+            if pending:
+                timeout = max(0.0, first_pending + self.flush_interval - time.monotonic())
+            try:
+                item = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if isinstance(item, str):
+                if not pending:
+                    first_pending = time.monotonic()
+                pending.append(item)
+                if len(pending) < self.batch_size:
+                    continue
+            self._write_batch(pending)
+            pending = []
+
+            if isinstance(item, threading.Event):
+                item.set()
+            elif item is _STOP:
+                if self._file is not None:
+                    self._file.close()
+                return
+
+    def _write_batch(self, lines):
+        if self.dropped > self.reported_dropped:
+            lines = lines + [f"[log-writer] {self.dropped - self.reported_dropped} "
+                             f"message(s) dropped (queue full)\n"]
+            self.reported_dropped = self.dropped
+        if not lines:
+            return
+        try:
+            if self._should_rotate():
+                self._rotate()
+            if self._file is None:
+                self._open()
+            self._file.write("".join(lines))
+            self._file.flush()
+            self.written += len(lines)
+            self.flushes += 1
+        except OSError:
+            # Losing log lines must never take the monitored process down
+            self.dropped += len(lines)
+            self.reported_dropped = self.dropped
+
+    # ---------- rotation ----------
+
+    def _open(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(self.path, "a", encoding=self.encoding)
+        self._opened_at = time.time()
+
+    def _should_rotate(self):
+        if self._file is None and not os.path.exists(self.path):
+            return False
+        if self.max_bytes and os.path.exists(self.path) and os.path.getsize(self.path) >= self.max_bytes:
+            return True
+        return bool(self.rotate_interval and self._opened_at
+                    and time.time() - self._opened_at >= self.rotate_interval)
+
+    def _rotated_name(self, index):
+        """Existing name of rotated file `index` (compressed or not), or None."""
+        for name in (f"{self.path}.{index}.gz", f"{self.path}.{index}"):
+            if os.path.exists(name):
+                return name
+        return None
+
+    def _rotate(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        oldest = self._rotated_name(self.backup_count)
+        if oldest:
+            os.remove(oldest)
+        for index in range(self.backup_count - 1, 0, -1):
+            name = self._rotated_name(index)
+            if name:
+                suffix = ".gz" if name.endswith(".gz") else ""
+                os.replace(name, f"{self.path}.{index + 1}{suffix}")
+        if self.backup_count <= 0:
+            os.remove(self.path)
+        else:
+            rotated = f"{self.path}.1"
+            os.replace(self.path, rotated)
+            if self.compress:
+                with open(rotated, "rb") as src, gzip.open(rotated + ".gz", "wb") as dst:
+                    shutil.copyfileobj(src, dst)
+                os.remove(rotated)
+        self.rotations += 1
+
+
+# ----------------------------
+# SHARED REGISTRY
+# ----------------------------
+
+_writers = {}
+_writers_lock = threading.Lock()
+
+
+def get_writer(path, **options):
+    """
+    Returns the shared writer for `path`, creating it on first use.
+    Options (see DEFAULT_OPTIONS) only apply when the writer is created.
+    """
+    key = os.path.abspath(path)
+    with _writers_lock:
+        writer = _writers.get(key)
+        if writer is None:
+            writer = AsyncLogWriter(path, **{**DEFAULT_OPTIONS, **options})
+            _writers[key] = writer
+        return writer
+
+
+@atexit.register
+def close_all():
+    """Flushes and stops every writer; runs automatically at interpreter exit."""
+    with _writers_lock:
+        writers = list(_writers.values())
+        _writers.clear()
+    for writer in writers:
+        writer.close()
@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+"""
+Metric History
+--------------
+Constant-memory time-series store for system_health_monitor.py.
+
+Samples are kept in fixed-size ring buffers of float64 values at three
+resolutions: raw samples, 1-minute averages and 1-hour averages. Coarser
+levels are filled by downsampling as samples arrive. The buffers live in a
+memory-mapped file, so history survives restarts, and memory use does not
+grow however long the monitor runs.
+
+Queries (rolling average, percentiles, max) pick the finest resolution
+that has samples inside the requested window and whose history covers it.
+"""
+
+import math
+import mmap
+import os
+import struct
+import time
+
+# ----------------------------
+# CONFIGURATION
+# ----------------------------
+
+METRICS = ("cpu", "memory", "disk")
+
+# (name, bucket seconds, capacity); bucket 0 means raw samples
+LEVELS = (
+    ("raw", 0, 3600),
+    ("1m", 60, 1440),        # 24 hours of 1-minute averages
+    ("1h", 3600, 24 * 90),   # 90 days of 1-hour averages
+)
+
+MAGIC = b"SHMH"
+VERSION = 1
+HEADER = struct.Struct("<4sII")   # magic, version, layout checksum
+HEADER_SIZE = 64                  # keeps the float64 area 8-byte aligned
+DOUBLE = 8
+
+# Per-level state slots: write position, number of rows, open bucket start
+# and number of samples in the open bucket, followed by one running sum per metric
+HEAD, COUNT, BUCKET_START, BUCKET_SAMPLES, SUMS = range(5)
+
+
+# ----------------------------
+# RING BUFFER
+# ----------------------------
+
+class RingBuffer:
+    """Fixed-capacity ring of rows (timestamp, value...) over a float64 memoryview."""
+
+    def __init__(self, data, state, width, capacity):
+        self.data = data
+        self.state = state
+        self.width = width
+        self.capacity = capacity
+
+    def __len__(self):
+        return int(self.state[COUNT])
+
+    def append(self, row):
+        head = int(self.state[HEAD])
+        start = head * self.width
+        for i, value in enumerate(row):
+            self.data[start + i] = value
+        self.state[HEAD] = (head + 1) % self.capacity
+        self.state[COUNT] = min(self.capacity, int(self.state[COUNT]) + 1)
+
+    def row(self, age):
+        """Row `age` steps back from the newest (0 = newest)."""
+        index = (int(self.state[HEAD]) - 1 - age) % self.capacity
+        start = index * self.width
+        return self.data[start:start + self.width]
+
+    def oldest_timestamp(self):
+        return self.row(len(self) - 1)[0] if len(self) else None
+
+    def newest_timestamp(self):
+        return self.row(0)[0] if len(self) else None
+
+    def values_since(self, column, since):
+        """Values of `column` for rows with timestamp >= `since`, newest first."""
+        values = []
+        for age in range(len(self)):
+            row = self.row(age)
+            if row[0] < since:
+                break
+            values.append(row[column])
+        return values
+
+
+def layout_checksum(metrics, levels):
+    """Stable checksum of the file layout, stored in the header."""
+    text = "|".join(metrics) + "|" + "|".join(f"{n}:{s}:{c}" for n, s, c in levels)
+    checksum = 0
+    for char in text.encode():
+        checksum = (checksum * 31 + char) & 0xFFFFFFFF
+    return checksum
+
+
+# ----------------------------
+# HISTORY STORE
+# ----------------------------
+
+class MetricHistory:
+    """Multi-resolution metric history, optionally persisted to a memory-mapped file."""
+
+    def __init__(self, path=None, metrics=METRICS, levels=LEVELS):
+        self.path = path
+        self.metrics = tuple(metrics)
+        self.levels = tuple(levels)
+        self.width = 1 + len(self.metrics)
+        state_size = (SUMS + len(self.metrics)) * DOUBLE
+        size = HEADER_SIZE + sum(state_size + capacity * self.width * DOUBLE
+                                 for _, _, capacity in self.levels)
+        layout = layout_checksum(self.metrics, self.levels)
+
+        self._file = None
+        if path is None:
+            self._buffer = bytearray(size)
+        else:
+            self._file = self._open_file(path, size, layout)
+            self._buffer = mmap.mmap(self._file.fileno(), size)
+        HEADER.pack_into(self._buffer, 0, MAGIC, VERSION, layout)
+
+        self._view = memoryview(self._buffer)
+        self.rings = []
+        offset = HEADER_SIZE
+        for _, _, capacity in self.levels:
+            state = self._view[offset:offset + state_size].cast("d")
+            offset += state_size
+            data_size = capacity * self.width * DOUBLE
+            data = self._view[offset:offset + data_size].cast("d")
+            offset += data_size
+            self.rings.append(RingBuffer(data, state, self.width, capacity))
+
+    @staticmethod
+    def _open_file(path, size, layout):
+        """Opens the history file, starting over if it has a different layout."""
+        mode = "r+b" if os.path.exists(path) else "w+b"
+        f = open(path, mode)
+        header = f.read(HEADER.size)
+        valid = (len(header) == HEADER.size and os.path.getsize(path) == size
+                 and HEADER.unpack(header) == (MAGIC, VERSION, layout))
+        if not valid:
+            f.seek(0)
+            f.truncate(0)
+            f.truncate(size)
+        return f
+
+    # ---------- writing ----------
+
+    def add(self, values, timestamp=None):
+        """Records one sample; `values` maps metric name to value."""
+        timestamp = time.time() if timestamp is None else timestamp
+        row = [timestamp] + [float(values[name]) for name in self.metrics]
+        for (_, seconds, _), ring in zip(self.levels, self.rings):
+            if seconds == 0:
+                ring.append(row)
+            else:
+                self._downsample(ring, seconds, row)
+
+    def _downsample(self, ring, seconds, row):
+        """Accumulates `row` into the open bucket, closing it when a new one starts."""
+        state = ring.state
+        bucket = math.floor(row[0] / seconds) * seconds
+        samples = int(state[BUCKET_SAMPLES])
+        if samples and state[BUCKET_START] != bucket:
+            ring.append([state[BUCKET_START]] + [state[SUMS + i] / samples
+                                                 for i in range(len(self.metrics))])
+            samples = 0
+        if samples == 0:
+            state[BUCKET_START] = bucket
+            for i in range(len(self.metrics)):
+                state[SUMS + i] = 0.0
+        for i, value in enumerate(row[1:]):
+            state[SUMS + i] += value
+        state[BUCKET_SAMPLES] = samples + 1
+
+    def flush(self):
+        """Forces the memory-mapped file to disk."""
+        if self._file is not None:
+            self._buffer.flush()
+
+    def close(self):
+        if self._file is None:
+            return
+        for ring in self.rings:
+            ring.data.release()
+            ring.state.release()
+        self._view.release()
+        self._buffer.flush()
+        self._buffer.close()
+        self._file.close()
+        self._file = None
+
+    # ---------- queries ----------
+
+    def window(self, metric, seconds, now=None):
+        """
+        Values of `metric` over the last `seconds`, from the finest level that
+        has rows inside the window and whose history covers all of it (or, if
+        none covers it, the one with the longest history). Falls back to the
+        raw samples when no level has rows inside the window yet.
+        """
+        now = time.time() if now is None else now
+        since = now - seconds
+        column = 1 + self.metrics.index(metric)
+        best, best_oldest = self.rings[0], None
+        for ring in self.rings:
+            if not len(ring) or ring.newest_timestamp() < since:
+                continue
+            oldest = ring.oldest_timestamp()
+            if oldest <= since:
+                return ring.values_since(column, since)
+            if best_oldest is None or oldest < best_oldest:
+                best, best_oldest = ring, oldest
+        return best.values_since(column, since)
+
+    def average(self, metric, seconds, now=None):
+        values = self.window(metric, seconds, now)
+        return sum(values) / len(values) if values else None
+
+    def maximum(self, metric, seconds, now=None):
+        values = self.window(metric, seconds, now)
+        return max(values) if values else None
+
+    def percentile(self, metric, seconds, q, now=None):
+        """q-th percentile (0-100) over the window, linearly interpolated."""
+        values = sorted(self.window(metric, seconds, now))
+        if not values:
+            return None
+        rank = (len(values) - 1) * q / 100
+        low = math.floor(rank)
+        high = min(low + 1, len(values) - 1)
+        return values[low] + (values[high] - values[low]) * (rank - low)
+
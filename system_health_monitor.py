@@ -12,6 +12,10 @@ import platform
 import time
 import datetime
 
+from health_sampler import ProcessSampler
+from log_writer import get_writer
+from metric_history import MetricHistory
+
 # ----------------------------
 # CONFIGURATION
 # ----------------------------
@@ -22,9 +26,22 @@ THRESHOLDS = {
     "disk": 85       # Warn if disk usage exceeds 85%
 }
 
-MONITOR_INTERVAL = 5  # seconds between checks
+MONITOR_INTERVAL = 5  # seconds between checks (sub-second values are supported)
 LOG_FILE = "system_health_log.txt"
 
+# Metric history (see metric_history.py); alerts fire on the average over
+# SUSTAINED_WINDOW seconds instead of a single sample
+HISTORY_FILE = "system_health_history.bin"
+SUSTAINED_WINDOW = 60
+
+# Buffered log writer settings (see log_writer.py)
+LOG_OPTIONS = {
+    "flush_interval": 1.0,             # seconds before buffered lines hit the disk
+    "max_bytes": 10 * 1024 * 1024,     # rotate the log at 10 MB
+    "backup_count": 5,                 # keep 5 rotated logs
+    "compress": False                  # keep rotated logs plain so log_query.py can index them
+}
+
 
 # ----------------------------
 # UTILITY FUNCTIONS
@@ -35,8 +52,7 @@ def log_message(message):
     timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     formatted = f"[{timestamp}] {message}"
     print(formatted)
-    with open(LOG_FILE, "a", encoding="utf-8") as f:
-        f.write(formatted + "\n")
+    get_writer(LOG_FILE, **LOG_OPTIONS).write(formatted + "\n")
 
 
 def get_system_info():
@@ -52,9 +68,9 @@ def get_system_info():
     }
 
 
-def check_cpu_usage():
-    """Checks CPU usage and warns if it exceeds threshold."""
-    cpu_percent = psutil.cpu_percent(interval=1)
+def check_cpu_usage(sample):
+    """Checks CPU usage from a ProcessSampler tick and warns if it exceeds threshold."""
+    cpu_percent = sample.cpu
     status = "⚠️ High CPU Usage" if cpu_percent > THRESHOLDS["cpu"] else "✅ Normal"
     log_message(f"CPU Usage: {cpu_percent}% — {status}")
     return cpu_percent
@@ -78,17 +94,29 @@ def check_disk_usage():
     return percent
 
 
-def list_top_processes(limit=5):
-    """Lists top processes by CPU usage."""
+def list_top_processes(sample, limit=5):
+    """Lists top processes by CPU usage from a ProcessSampler tick."""
     log_message(f"Top {limit} Processes by CPU Usage:")
-    processes = [(p.info["pid"], p.info["name"], p.info["cpu_percent"])
-                 for p in psutil.process_iter(["pid", "name", "cpu_percent"])]
-    sorted_procs = sorted(processes, key=lambda x: x[2], reverse=True)[:limit]
-    for pid, name, cpu in sorted_procs:
+    for pid, name, cpu in sample.top[:limit]:
         log_message(f"   PID={pid} | {name} | CPU={cpu}%")
+    log_message(f"   Sampled {sample.process_count} processes in {sample.overhead_ms} ms")
     log_message("-" * 50)
 
 
+def check_sustained_load(history, window=SUSTAINED_WINDOW):
+    """Logs rolling averages over `window` seconds and returns the metrics above threshold."""
+    averages = {name: history.average(name, window) for name in THRESHOLDS}
+    cpu_p95 = history.percentile("cpu", window, 95)
+
+    def percent(value):
+        return "n/a" if value is None else f"{value:.1f}%"
+
+    log_message(f"📈 {window}s avg: CPU {percent(averages['cpu'])} (p95 {percent(cpu_p95)}) | "
+                f"Memory {percent(averages['memory'])} | Disk {percent(averages['disk'])}")
+    return [name for name, value in averages.items()
+            if value is not None and value > THRESHOLDS[name]]
+
+
 # ----------------------------
 # MAIN MONITORING LOOP
 # ----------------------------
@@ -101,21 +129,39 @@ def monitor_system():
         log_message(f"{key}: {value}")
     log_message("==========================================")
 
+    sampler = ProcessSampler(limit=5)
+    history = MetricHistory(HISTORY_FILE)
+    next_check = time.monotonic()
     try:
         while True:
             log_message("\n📊 Checking system health...")
-            cpu = check_cpu_usage()
+            sample = sampler.tick()
+            cpu = check_cpu_usage(sample)
             mem = check_memory_usage()
             disk = check_disk_usage()
-            list_top_processes(limit=5)
-
-            if cpu > THRESHOLDS["cpu"] or mem > THRESHOLDS["memory"] or disk > THRESHOLDS["disk"]:
-                log_message("🚨 ALERT: One or more thresholds exceeded! Please investigate.\n")
-
-            time.sleep(MONITOR_INTERVAL)
+            list_top_processes(sample, limit=5)
+
+            history.add({"cpu": cpu, "memory": mem, "disk": disk}, sample.timestamp)
+            sustained = check_sustained_load(history)
+            if sustained:
+                log_message(f"🚨 ALERT: Sustained high {', '.join(sustained)} usage "
+                            f"(avg over last {SUSTAINED_WINDOW}s)! Please investigate.\n")
+
+            # Keep a steady cadence: subtract the time this cycle took
+            next_check += MONITOR_INTERVAL
+            now = time.monotonic()
+            if next_check < now:
+                # Slow cycle or host suspend: skip missed checks instead of replaying them
+                next_check = now
+            time.sleep(next_check - now)
     except KeyboardInterrupt:
+        overhead = sampler.overhead_summary()
         log_message("\n🛑 Monitoring stopped by user.")
+        log_message(f"Sampler overhead: avg {overhead['avg_ms']} ms | max {overhead['max_ms']} ms "
+                    f"over {overhead['ticks']} ticks")
         log_message("==========================================\n")
+    finally:
+        history.close()
 
 
 # ----------------------------
@@ -0,0 +1,38 @@
+import os
+import socket
+import sys
+import tarfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import automated_backup
+
+
+def test_create_backup_stores_links_and_skips_sockets(tmp_path, monkeypatch):
+    messages = []
+    monkeypatch.setattr(automated_backup, "log_message", messages.append)
+    source = tmp_path / "data"
+    (source / "docs").mkdir(parents=True)
+    (source / "docs" / "notes.txt").write_text("hello")
+    os.symlink("docs", source / "docs-link")
+    os.symlink("docs/notes.txt", source / "notes-link")
+    os.mkfifo(source / "pipe")
+    server = socket.socket(socket.AF_UNIX)
+    server.bind(str(source / "control.sock"))
+
+    destination = str(tmp_path / "backups" / "backup.tar.gz")
+    stats = {}
+    try:
+        assert automated_backup.create_backup(str(source), destination, stats)
+    finally:
+        server.close()
+
+    assert stats["error"] is None
+    assert [name for name, *_ in stats["files"]] == ["data/docs/notes.txt"]
+    with tarfile.open(destination) as tar:
+        members = {member.name: member for member in tar.getmembers()}
+    assert members["data/docs-link"].issym()
+    assert members["data/notes-link"].issym()
+    assert members["data/pipe"].isfifo()
+    assert "data/control.sock" not in members
+    assert any("control.sock" in message for message in messages)
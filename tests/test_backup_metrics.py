@@ -0,0 +1,13 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import backup_metrics
+
+
+def test_compare_before_the_first_run(tmp_path, capsys):
+    metrics_file = str(tmp_path / "backup_metrics.jsonl")
+    assert backup_metrics.load_records(metrics_file) == []
+    assert backup_metrics.main(["--metrics", metrics_file, "compare"]) == 0
+    assert "Need at least two successful runs" in capsys.readouterr().out
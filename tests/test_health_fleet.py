@@ -0,0 +1,63 @@
+import asyncio
+import os
+import socket
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import health_fleet
+from health_fleet import FleetCollector, FleetSample, encode_sample
+
+
+def send(collector, host, cpu=10.0):
+    collector.ingest(encode_sample(FleetSample(host, 0.0, cpu, 20.0, 30.0, [])))
+
+
+def test_silent_hosts_go_stale_then_are_evicted(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(health_fleet.time, "monotonic", lambda: now[0])
+    collector = FleetCollector(stale_after=30, evict_after=300)
+    send(collector, "old")
+    send(collector, "live")
+
+    now[0] += 60
+    send(collector, "live")
+    _, stale, _ = collector.evaluate()
+    assert stale == ["old"]
+    assert set(collector.hosts) == {"old", "live"}
+
+    now[0] += 250
+    send(collector, "live")
+    _, stale, fleet = collector.evaluate()
+    assert stale == []
+    assert set(collector.hosts) == {"live"}
+    assert collector.evicted == 1
+    assert fleet["cpu"] == 10.0
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_collector_stops_with_a_connected_tcp_agent(monkeypatch, caplog):
+    monkeypatch.setattr(health_fleet, "log_message", lambda message: None)
+    port = free_port()
+
+    async def scenario():
+        server = asyncio.create_task(health_fleet.serve_collector(
+            "127.0.0.1", port, ("tcp",), evaluate_interval=0.2, duration=0.5))
+        await asyncio.sleep(0.1)
+        _, writer = await asyncio.open_connection("127.0.0.1", port)
+        payload = encode_sample(FleetSample("agent", 0.0, 10.0, 20.0, 30.0, []))
+        writer.write(health_fleet.FRAME.pack(len(payload)) + payload)
+        await writer.drain()
+        try:
+            return await asyncio.wait_for(server, timeout=5)
+        finally:
+            writer.close()
+
+    collector = asyncio.run(scenario())
+    assert set(collector.hosts) == {"agent"}
+    assert not [r for r in caplog.records if r.name == "asyncio" and r.exc_info]
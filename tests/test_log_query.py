@@ -0,0 +1,76 @@
+import gzip
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import log_query
+import log_writer
+import system_health_monitor
+
+STRIDE = 256
+
+
+def write_log(path, day, cpu, count=100):
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(count):
+            f.write(f"[2025-11-{day:02d} 10:{i // 60:02d}:{i % 60:02d}] CPU Usage: {cpu}% | ✅ Normal\n")
+
+
+def test_index_is_rebuilt_when_log_is_replaced_by_a_larger_file(tmp_path):
+    path = str(tmp_path / "system_health_log.txt")
+    write_log(path, 11, 10.0)
+    values, _ = log_query.query([path], "cpu", stride=STRIDE)
+    assert len(values) == 100
+
+    replacement = str(tmp_path / "replacement.txt")
+    write_log(replacement, 12, 20.0, count=150)
+    os.replace(replacement, path)
+    values, _ = log_query.query([path], "cpu", "2025-11-12 10:00:00", "2025-11-12 10:02:29",
+                                stride=STRIDE)
+    assert len(values) == 150
+    assert set(values) == {20.0}
+
+
+def test_gzip_archives_are_scanned(tmp_path):
+    path = str(tmp_path / "system_health_log.txt")
+    write_log(path, 11, 30.0)
+    with open(path, "rb") as src, gzip.open(path + ".1.gz", "wb") as dst:
+        dst.write(src.read())
+    values, stats = log_query.query([path + ".1.gz"], "cpu", "2025-11-11 10:01:00")
+    assert len(values) == 40
+    assert stats["scanned_bytes"] == stats["total_bytes"]
+
+
+def test_rotated_logs_are_indexed_and_skipped_outside_the_window(tmp_path):
+    path = str(tmp_path / "system_health_log.txt")
+    options = {**system_health_monitor.LOG_OPTIONS, "max_bytes": 1024, "batch_size": 10}
+    writer = log_writer.AsyncLogWriter(path, **options)
+    for day in (11, 12):
+        for i in range(60):
+            writer.write(f"[2025-11-{day:02d} 10:{i:02d}:00] CPU Usage: {day}.0% | ✅ Normal\n")
+        writer.flush()
+    writer.close()
+
+    logs = [path] + sorted(str(p) for p in tmp_path.glob("system_health_log.txt.[0-9]"))
+    assert len(logs) > 2
+    values, stats = log_query.query(logs, "cpu", "2025-11-12 10:30:00", stride=STRIDE)
+    assert len(values) == 30
+    assert stats["scanned_bytes"] < stats["total_bytes"] / 2
+
+
+def test_cli_reports_bad_times_and_missing_logs(tmp_path, capsys):
+    path = str(tmp_path / "system_health_log.txt")
+    write_log(path, 11, 10.0)
+    for argv in (["cpu", path, "--since", "2025-13-01"],
+                 ["cpu", path, "--until", "yesterday"],
+                 ["cpu", path, str(tmp_path / "missing.txt")]):
+        with pytest.raises(SystemExit) as exit_info:
+            log_query.main(argv)
+        assert exit_info.value.code == 2
+    assert "missing.txt" in capsys.readouterr().err
+
+    log_query.main(["cpu", path, "--since", "2025-11-11 10:01", "--until", "2025-11-11"])
+    assert "Samples: 40" in capsys.readouterr().out
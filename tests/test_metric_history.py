@@ -0,0 +1,57 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import metric_history
+import system_health_monitor
+from metric_history import MetricHistory
+
+START = 1_700_000_025.0   # 45 seconds into a minute
+INTERVAL = 5
+
+
+def fill(history, until, cpu=90.0):
+    timestamp = START
+    while timestamp <= until:
+        history.add({"cpu": cpu, "memory": 50.0, "disk": 40.0}, timestamp)
+        timestamp += INTERVAL
+
+
+def test_window_uses_raw_samples_after_first_minute_rollover():
+    history = MetricHistory()
+    now = START + 30   # the 1m level now holds one bucket that starts before `since`
+    fill(history, now)
+    assert len(history.rings[1]) == 1
+    assert history.window("cpu", 60, now) == [90.0] * 7
+    assert history.average("cpu", 60, now) == 90.0
+
+
+def test_window_prefers_finest_level_covering_the_window():
+    history = MetricHistory()
+    now = START + 3 * 3600
+    fill(history, now)
+    assert len(history.window("cpu", 600, now)) == 600 // INTERVAL + 1
+    assert len(history.window("cpu", 2 * 3600, now)) == 2 * 3600 // INTERVAL + 1
+
+
+def test_window_is_empty_without_recent_samples():
+    history = MetricHistory()
+    fill(history, START + 600)
+    assert history.window("cpu", 60, START + 7200) == []
+    assert history.average("cpu", 60, START + 7200) is None
+
+
+def test_check_sustained_load_tolerates_empty_and_partial_windows(monkeypatch):
+    messages = []
+    monkeypatch.setattr(system_health_monitor, "log_message", messages.append)
+    history = MetricHistory()
+    now = START + 30
+    monkeypatch.setattr(metric_history.time, "time", lambda: now)
+
+    assert system_health_monitor.check_sustained_load(history) == []
+    assert "n/a" in messages[-1]
+
+    fill(history, now)
+    assert system_health_monitor.check_sustained_load(history) == ["cpu"]
+    assert "CPU 90.0%" in messages[-1]